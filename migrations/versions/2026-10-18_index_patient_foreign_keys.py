@@ -0,0 +1,38 @@
+"""Index patients.therapist_id and patient_records.patient_id
+
+Revision ID: a47e2c915b3d
+Revises: 8d3b6a9f04c2
+Create Date: 2026-10-18 14:05:52.730914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a47e2c915b3d'
+down_revision: Union[str, None] = '8d3b6a9f04c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_patients_therapist_id'), 'patients', ['therapist_id'], unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f('ix_patient_records_patient_id'), 'patient_records', ['patient_id'], unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_patient_records_patient_id'), table_name='patient_records', postgresql_concurrently=True
+        )
+        op.drop_index(op.f('ix_patients_therapist_id'), table_name='patients', postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""Add patients.import_key for idempotent imports
+
+Revision ID: 6e2b94d0c5a8
+Revises: 3f9d61c2b8e7
+Create Date: 2026-10-18 17:48:26.905132
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b94d0c5a8'
+down_revision: Union[str, None] = '3f9d61c2b8e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('patients', sa.Column('import_key', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_patients_therapist_id_import_key', 'patients', ['therapist_id', 'import_key'], unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_patients_therapist_id_import_key', table_name='patients', postgresql_concurrently=True
+        )
+    op.drop_column('patients', 'import_key')
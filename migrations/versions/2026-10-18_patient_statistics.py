@@ -0,0 +1,52 @@
+"""Add patient_statistics counters table
+
+Revision ID: 5c1f0e2d7a41
+Revises: bee3b7c8b534
+Create Date: 2026-10-18 10:12:31.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e2d7a41'
+down_revision: Union[str, None] = 'bee3b7c8b534'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('patient_statistics',
+    sa.Column('therapist_id', sa.UUID(), nullable=False),
+    sa.Column('bp', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('dep', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('ischemia', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('city', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('district', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('male', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('female', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['therapist_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('therapist_id')
+    )
+    op.execute(
+        """
+        INSERT INTO patient_statistics (therapist_id, bp, dep, ischemia, city, district, male, female)
+        SELECT therapist_id,
+               count(*) FILTER (WHERE bp),
+               count(*) FILTER (WHERE dep),
+               count(*) FILTER (WHERE ischemia),
+               count(*) FILTER (WHERE strpos(lower(inhabited_locality), 'город') > 0),
+               count(*) FILTER (WHERE strpos(lower(inhabited_locality), 'село') > 0),
+               count(*) FILTER (WHERE lower(gender) = 'м'),
+               count(*) FILTER (WHERE lower(gender) = 'ж')
+        FROM patients
+        GROUP BY therapist_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('patient_statistics')
@@ -0,0 +1,50 @@
+"""Add trigram and lower() indexes for patient text filters
+
+Revision ID: 8d3b6a9f04c2
+Revises: 5c1f0e2d7a41
+Create Date: 2026-10-18 11:40:07.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3b6a9f04c2'
+down_revision: Union[str, None] = '5c1f0e2d7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TEXT_SEARCH_COLUMNS = ('full_name', 'living_place', 'job_title', 'inhabited_locality')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CONCURRENTLY cannot run inside a transaction, but keeps patients writable while indexes build
+    with op.get_context().autocommit_block():
+        for name in TEXT_SEARCH_COLUMNS:
+            op.create_index(
+                f'ix_patients_{name}_trgm',
+                'patients',
+                [name],
+                postgresql_using='gin',
+                postgresql_ops={name: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+            op.create_index(
+                f'ix_patients_{name}_lower',
+                'patients',
+                [sa.text(f'lower({name}) text_pattern_ops')],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in TEXT_SEARCH_COLUMNS:
+            op.drop_index(f'ix_patients_{name}_lower', table_name='patients', postgresql_concurrently=True)
+            op.drop_index(f'ix_patients_{name}_trgm', table_name='patients', postgresql_concurrently=True)
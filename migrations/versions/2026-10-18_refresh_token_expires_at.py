@@ -0,0 +1,36 @@
+"""Replace refresh_tokens.expires_in with an indexed expires_at
+
+Revision ID: 3f9d61c2b8e7
+Revises: a47e2c915b3d
+Create Date: 2026-10-18 15:12:04.318275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d61c2b8e7'
+down_revision: Union[str, None] = 'a47e2c915b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.execute("UPDATE refresh_tokens SET expires_at = created_at + expires_in * interval '1 second'")
+    op.alter_column('refresh_tokens', 'expires_at', nullable=False)
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+    op.drop_column('refresh_tokens', 'expires_in')
+
+
+def downgrade() -> None:
+    op.add_column('refresh_tokens', sa.Column('expires_in', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE refresh_tokens SET expires_in = GREATEST(EXTRACT(EPOCH FROM expires_at - created_at), 0)::int"
+    )
+    op.alter_column('refresh_tokens', 'expires_in', nullable=False)
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'expires_at')
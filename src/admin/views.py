@@ -1,7 +1,12 @@
+from typing import Any
+
 from sqladmin import ModelView
+from starlette.requests import Request
 
 from ..auth.models import User
+from ..auth.service import UserService
 from ..patient.models import Patient
+from ..patient.service import PatientService
 from ..patient_records.models import PatientRecord
 
 
@@ -22,6 +27,17 @@ class UserAdmin(ModelView, model=User):
         User.patients: "Пациенты",
     }
 
+    # Role, activity and password edits made here must not be served from the auth cache
+    async def after_model_change(self, data: dict, model: Any, is_created: bool, request: Request) -> None:
+        if not is_created:
+            await UserService.invalidate_cached_user(model.id)
+
+    async def on_model_delete(self, model: Any, request: Request) -> None:
+        request.state.user_id = model.id
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        await UserService.invalidate_cached_user(request.state.user_id)
+
 
 class PatientAdmin(ModelView, model=Patient):
     column_list = [Patient.full_name, Patient.therapist, Patient.records]
@@ -35,6 +51,21 @@ class PatientAdmin(ModelView, model=Patient):
     column_sortable_list = [Patient.therapist, Patient.gender]
     column_labels = {Patient.full_name: "ФИО", Patient.therapist: "Терапевт", Patient.records: "Записи"}
 
+    # Changes made here bypass PatientService, so the statistics counters are kept in step explicitly
+    async def on_model_change(self, data: dict, model: Any, is_created: bool, request: Request) -> None:
+        request.state.patient_before = None if is_created else PatientService.snapshot(model)
+
+    async def after_model_change(self, data: dict, model: Any, is_created: bool, request: Request) -> None:
+        await PatientService.sync_statistic(
+            before=request.state.patient_before, after=PatientService.snapshot(model)
+        )
+
+    async def on_model_delete(self, model: Any, request: Request) -> None:
+        request.state.patient_before = PatientService.snapshot(model)
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        await PatientService.sync_statistic(before=request.state.patient_before)
+
 
 class PatientRecordAdmin(ModelView, model=PatientRecord):
     column_list = [PatientRecord.patient, PatientRecord.visit]
@@ -1,4 +1,8 @@
+from sqlalchemy import String, any_, bindparam, delete, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
 from ..dao import BaseDAO
+from ..database import session_scope
 from .models import RefreshToken, User
 from .schemas import RefreshTokenCreate, RefreshTokenUpdate, UserCreateDB, UserUpdate
 
@@ -6,6 +10,35 @@ from .schemas import RefreshTokenCreate, RefreshTokenUpdate, UserCreateDB, UserU
 class UserDAO(BaseDAO[User, UserCreateDB, UserUpdate]):
     model = User
 
+    @classmethod
+    async def find_existing_usernames(cls, usernames: list[str]) -> set[str]:
+        """Returns which of the given usernames are already taken, in a single query."""
+        stmt = select(User.username).where(
+            User.username == any_(bindparam("usernames", usernames, type_=ARRAY(String)))
+        )
+        async with session_scope() as db:
+            result = await db.execute(stmt)
+            return set(result.scalars().all())
+
 
 class RefreshTokenDAO(BaseDAO[RefreshToken, RefreshTokenCreate, RefreshTokenUpdate]):
     model = RefreshToken
+
+    @classmethod
+    async def delete_expired(cls, limit: int) -> int:
+        """Deletes up to ``limit`` expired tokens and returns how many were removed.
+
+        Rows are picked by a range scan on ix_refresh_tokens_expires_at; locked rows are
+        skipped so a purge never waits on a concurrent refresh.
+        """
+        expired = (
+            select(RefreshToken.id)
+            .where(RefreshToken.expires_at <= func.now())
+            .order_by(RefreshToken.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with session_scope() as db:
+            result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired)))
+            return result.rowcount
@@ -21,7 +21,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User | None:
             raise exceptions.InvalidToken
     except Exception:
         raise exceptions.InvalidToken
-    current_user = await UserService.get_user(uuid.UUID(user_id))
+    current_user = await UserService.get_authenticated_user(uuid.UUID(user_id))
+    if current_user is None:
+        raise exceptions.InvalidToken
     if not current_user.is_active:
         raise exceptions.Forbidden
     return current_user
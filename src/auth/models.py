@@ -35,7 +35,7 @@ class RefreshToken(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     refresh_token: Mapped[uuid.UUID] = mapped_column(UUID, index=True)
-    expires_in: Mapped[int]
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), index=True)
     created_at: Mapped[datetime_tz_param]
 
     user_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id", ondelete="CASCADE"))
@@ -0,0 +1,11 @@
+import asyncio
+
+from src.auth.service import AuthService
+
+
+async def main():
+    await AuthService.purge_expired_refresh_tokens()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
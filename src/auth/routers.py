@@ -2,6 +2,7 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, Request, Response, status
 
+from ..pagination import Page
 from . import schemas
 from .dependencies import get_current_active_user, get_current_superuser, get_current_user
 from .models import User
@@ -43,10 +44,13 @@ async def get_me(user: User = Depends(get_current_user)):
 async def get_all_users(
     offset: Optional[int] = 0,
     limit: Optional[int] = 100,
+    cursor: Optional[str] = None,
     is_active: bool = True,
     user: User = Depends(get_current_active_user),
-) -> list[schemas.UserGet]:
-    return await UserService.get_all_users(is_active=is_active, offset=offset, limit=limit, user=user)
+) -> Page[schemas.UserGet]:
+    return await UserService.get_all_users(
+        is_active=is_active, offset=offset, limit=limit, cursor=cursor, user=user
+    )
 
 
 @user_router.patch("/set_user_role")
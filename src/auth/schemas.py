@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
@@ -66,7 +67,7 @@ class UserGet(UserBase):
 
 class RefreshTokenCreate(BaseModel):
     refresh_token: UUID
-    expires_in: int
+    expires_at: datetime
     user_id: UUID
 
 
@@ -1,17 +1,27 @@
+import asyncio
 import uuid
 from datetime import datetime, timedelta, timezone
 
 import jwt
 from fastapi import Response
 from loguru import logger
-from sqlalchemy import or_
+from sqlalchemy import inspect, or_
+from sqlalchemy.orm import make_transient_to_detached
 
+from ..cache import InMemoryCacheBackend
 from ..config import settings
+from ..database import after_commit
 from ..utils import log_error_with_method_info
 from . import exceptions, models, schemas, utils
 from .dao import RefreshTokenDAO, UserDAO
 
 
+# Per-process cache of users resolved from access tokens, so authenticated requests skip the
+# user lookup. Entries are dropped when the user changes; the short TTL bounds staleness
+# across workers.
+user_cache = InMemoryCacheBackend(max_entries=settings.USER_CACHE_MAX_ENTRIES)
+
+
 class UserService:
 
     @classmethod
@@ -26,16 +36,39 @@ class UserService:
     @classmethod
     async def create_user_accounts(cls, account_count: int, default_role: str) -> list[models.User]:
         try:
-            user_list = []
-            for _ in range(account_count):
-                user_account_data = await cls.__generate_user_account_data(default_role)
-                user_list.append(user_account_data)
-                await cls.create_user(user_account_data)
+            user_list = await cls.__generate_unique_accounts(account_count, default_role)
+            hashed_passwords = await asyncio.gather(
+                *(utils.get_hashed_password(user.password) for user in user_list)
+            )
+            await UserDAO.add_many(
+                [
+                    schemas.UserCreateDB(**user.model_dump(), hashed_password=hashed_password)
+                    for user, hashed_password in zip(user_list, hashed_passwords)
+                ]
+            )
+            logger.info(f"Создано {len(user_list)} аккаунтов с ролью {default_role}")
             return user_list
 
         except Exception as e:
             log_error_with_method_info(e)
 
+    @classmethod
+    async def __generate_unique_accounts(
+        cls, account_count: int, default_role: str
+    ) -> list[schemas.UserCreate]:
+        accounts: dict[str, schemas.UserCreate] = {}
+        while len(accounts) < account_count:
+            candidates = {}
+            for _ in range(account_count - len(accounts)):
+                account = await cls.__generate_user_account_data(default_role)
+                if account.username not in accounts:
+                    candidates[account.username] = account
+
+            taken = await UserDAO.find_existing_usernames(list(candidates))
+            accounts.update({name: account for name, account in candidates.items() if name not in taken})
+
+        return list(accounts.values())
+
     @staticmethod
     async def __generate_user_account_data(default_role: str) -> schemas.UserCreate:
         try:
@@ -85,13 +118,52 @@ class UserService:
         except Exception as e:
             log_error_with_method_info(e)
 
+    @classmethod
+    async def get_authenticated_user(cls, user_id: uuid.UUID) -> models.User | None:
+        try:
+            user = await user_cache.get(str(user_id))
+            if user is None:
+                user = await UserDAO.find_one_or_none(id=user_id)
+                if user is not None:
+                    user = cls.__detached_copy(user)
+                    await user_cache.set(str(user_id), user, settings.USER_CACHE_TTL_SECONDS)
+            return user
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @staticmethod
+    def __detached_copy(user: models.User) -> models.User:
+        """Copies the loaded columns into an instance outside any session.
+
+        The cached user outlives the request that loaded it, and a rollback of that request
+        would expire the session's instance and break every later cache hit.
+        """
+        copy = models.User(
+            **{attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs}
+        )
+        make_transient_to_detached(copy)
+        return copy
+
+    @staticmethod
+    async def invalidate_cached_user(user_id: uuid.UUID | str) -> None:
+        key = str(uuid.UUID(str(user_id)))
+
+        async def drop():
+            await user_cache.delete(key)
+
+        await after_commit(drop)
+
     @classmethod
     async def get_all_users(
-        cls, *filter, offset: int, limit: int, user: models.User, **filter_by
-    ) -> list[models.User]:
+        cls, *filter, offset: int, limit: int, user: models.User, cursor: str | None = None, **filter_by
+    ) -> dict:
         try:
             logger.info(f"Пользователь {user.username} получает данные о всех пользователях")
-            return await UserDAO.find_all(*filter, offset=offset, limit=limit, **filter_by)
+            users, next_cursor = await UserDAO.find_page(
+                *filter, cursor=cursor, offset=offset, limit=limit, **filter_by
+            )
+            return {"items": users, "next_cursor": next_cursor}
 
         except Exception as e:
             log_error_with_method_info(e)
@@ -120,6 +192,7 @@ class UserService:
                 raise exceptions.UserDoesNotExist
 
             await UserDAO.update(models.User.id == user.id, obj_in={"is_superuser": not (user.is_superuser)})
+            await cls.invalidate_cached_user(user.id)
             return {"Message": f"Пользователь {user_id} теперь имеет статус: {not (user.is_superuser)}"}
 
         except Exception as e:
@@ -135,6 +208,7 @@ class UserService:
                 f"Администратор {superuser.username} выдает роль пользователю {user.username}: {new_role}"
             )
             await UserDAO.update(models.User.id == user.id, obj_in={"role": new_role})
+            await cls.invalidate_cached_user(user.id)
             return {"Message": f"Пользователь {user.username} теперь имеет роль {new_role}"}
 
         except Exception as e:
@@ -146,6 +220,7 @@ class UserService:
             await utils.validate_password(password.old_password, user.hashed_password)
             new_hashed_password = await utils.get_hashed_password(password.new_password)
             await UserDAO.update(models.User.id == user.id, obj_in={"hashed_password": new_hashed_password})
+            await cls.invalidate_cached_user(user.id)
             logger.info(f"Пользователь {user.username} сменил пароль")
             return {"message": "Пароль был изменен успешно"}
 
@@ -168,6 +243,7 @@ class UserService:
                 raise exceptions.UserDoesNotExist
 
             await UserDAO.update(models.User.id == user_id, obj_in={"is_active": False})
+            await cls.invalidate_cached_user(user_id)
             return {"Message": f"Статус пользователя {user_id} был изменен на 'Неактивен'"}
 
         except Exception as e:
@@ -177,6 +253,7 @@ class UserService:
     async def delete_user(cls, user_id: uuid.UUID) -> dict:
         try:
             await UserDAO.delete(models.User.id == user_id)
+            await cls.invalidate_cached_user(user_id)
             return {"Message": f"Администратор удалил пользователя с идентификатором {user_id} успешно"}
 
         except Exception as e:
@@ -247,7 +324,8 @@ class AuthService:
                 schemas.RefreshTokenCreate(
                     user_id=user_id,
                     refresh_token=refresh_token,
-                    expires_in=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds(),
+                    expires_at=datetime.now(timezone.utc)
+                    + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
                 )
             )
             return schemas.Token(access_token=access_token, refresh_token=refresh_token, token_type="Bearer")
@@ -288,9 +366,7 @@ class AuthService:
             if refresh_token is None:
                 raise exceptions.InvalidToken
 
-            if datetime.now(timezone.utc) >= refresh_token.created_at + timedelta(
-                seconds=refresh_token.expires_in
-            ):
+            if datetime.now(timezone.utc) >= refresh_token.expires_at:
                 await RefreshTokenDAO.delete(id=refresh_token.id)
                 await cls.__delete_tokens_from_cookie(response)
                 raise exceptions.TokenExpired
@@ -300,14 +376,13 @@ class AuthService:
                 raise exceptions.InvalidToken
 
             access_token = await cls.__create_access_token(user.id)
-            refresh_token_expires = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
             new_refresh_token = await cls.__create_refresh_token()
 
             await cls.__set_tokens_in_cookie(response, access_token, new_refresh_token)
             await RefreshTokenDAO.update(
                 models.RefreshToken.id == refresh_token.id,
                 obj_in=schemas.RefreshTokenUpdate(
-                    refresh_token=new_refresh_token, expires_in=refresh_token_expires.total_seconds()
+                    refresh_token=new_refresh_token, expires_at=refresh_token.expires_at
                 ),
             )
             return {"message": "Tokens were refreshed successfully"}
@@ -389,6 +464,25 @@ class AuthService:
         except Exception as e:
             log_error_with_method_info(e)
 
+    @classmethod
+    async def purge_expired_refresh_tokens(
+        cls, batch_size: int = settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    ) -> int:
+        try:
+            purged = 0
+            while True:
+                deleted = await RefreshTokenDAO.delete_expired(limit=batch_size)
+                purged += deleted
+                if deleted < batch_size:
+                    break
+
+            if purged:
+                logger.info(f"Удалено {purged} просроченных refresh токенов")
+            return purged
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
     @classmethod
     async def abort_all_sessions(cls, user_id: uuid.UUID):
         try:
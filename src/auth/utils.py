@@ -1,6 +1,10 @@
+import asyncio
 import hashlib
+import hmac
 import random
 import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import HTTPException, Request, status
 from fastapi.openapi.models import OAuthFlows as OAuthFlowsModel
@@ -11,6 +15,16 @@ from ..config import settings
 from . import exceptions
 
 
+# pbkdf2_hmac releases the GIL, so hashing in threads keeps the event loop free. The pool size
+# caps how many hashes run at once; hashes over the cap wait in the executor queue.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_CONCURRENCY, thread_name_prefix="password-hash"
+)
+# "pending" is updated on the event loop, "running" and "completed" in the worker threads
+_hash_stats = {"pending": 0, "running": 0, "completed": 0}
+_hash_stats_lock = threading.Lock()
+
+
 class OAuth2PasswordBearerWithCookie(OAuth2):
     def __init__(
         self,
@@ -64,7 +78,7 @@ async def validate_password(password: str, hashed_password: str) -> None:
     """
     salt, hashed = hashed_password.split(settings.PASSWORD_SALT_SEPARATOR)
 
-    if not await __hash_password(password, salt) == hashed:
+    if not hmac.compare_digest(await __hash_password(password, salt), hashed):
         raise exceptions.InvalidAuthenthicationCredential
 
     return {"Message": "Password is valid"}
@@ -82,13 +96,52 @@ async def __hash_password(password: str, salt: str = None) -> str:
     """
     if salt is None:
         salt = await get_random_string()
-    enc = hashlib.pbkdf2_hmac(
-        settings.PASSWORD_HASH_NAME, password.encode(), salt.encode(), settings.PASSWORD_HASH_ITERATIONS
-    )
+
+    with _hash_stats_lock:
+        _hash_stats["pending"] += 1
+    try:
+        enc = await asyncio.get_running_loop().run_in_executor(
+            _hash_executor,
+            _pbkdf2_hmac,
+            settings.PASSWORD_HASH_NAME,
+            password.encode(),
+            salt.encode(),
+            settings.PASSWORD_HASH_ITERATIONS,
+        )
+    finally:
+        with _hash_stats_lock:
+            _hash_stats["pending"] -= 1
 
     return enc.hex()
 
 
+def _pbkdf2_hmac(hash_name: str, password: bytes, salt: bytes, iterations: int) -> bytes:
+    with _hash_stats_lock:
+        _hash_stats["running"] += 1
+    try:
+        return hashlib.pbkdf2_hmac(hash_name, password, salt, iterations)
+    finally:
+        with _hash_stats_lock:
+            _hash_stats["running"] -= 1
+            _hash_stats["completed"] += 1
+
+
+def get_hashing_stats() -> dict:
+    """Returns the password hashing queue depth.
+
+    Returns:
+        dict: Number of queued and running hashes, the total completed and the concurrency cap.
+    """
+    with _hash_stats_lock:
+        pending, running, completed = _hash_stats["pending"], _hash_stats["running"], _hash_stats["completed"]
+    return {
+        "queued": max(pending - running, 0),
+        "running": running,
+        "completed": completed,
+        "max_concurrency": settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    }
+
+
 async def get_hashed_password(password: str) -> str:
     """Gets the hashed password.
 
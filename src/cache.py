@@ -0,0 +1,167 @@
+import functools
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable
+
+from pydantic import TypeAdapter
+
+from .config import settings
+from .database import after_commit
+
+
+@functools.lru_cache(maxsize=None)
+def _get_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses and tag versions.
+
+    Entries are never deleted on invalidation: every key embeds the current versions of its
+    tags, so bumping a tag version makes all entries under it unreachable at once.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_versions(self, tags: list[str]) -> list[int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bump(self, tags: list[str]) -> None:
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-process LRU cache with TTL, enough for a single worker."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def get_versions(self, tags: list[str]) -> list[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    async def bump(self, tags: list[str]) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by all workers. Requires the optional ``redis`` dependency group."""
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Any | None:
+        value = await self._redis.get(key)
+        return None if value is None else json.loads(value)
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self._redis.set(key, json.dumps(value), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def get_versions(self, tags: list[str]) -> list[int]:
+        versions = await self._redis.mget([f"cache:tag:{tag}" for tag in tags])
+        return [int(version or 0) for version in versions]
+
+    async def bump(self, tags: list[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f"cache:tag:{tag}")
+            await pipe.execute()
+
+
+class ResponseCache:
+    """Read-through cache for endpoint responses.
+
+    Values are stored in their JSON form, validated through the endpoint's response model,
+    so they can be shared between workers and do not keep ORM objects alive.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        key_parts: dict[str, Any],
+        tags: list[str],
+        loader: Callable[[], Awaitable[Any]],
+        response_model: Any,
+    ) -> Any:
+        versions = await self.backend.get_versions(tags)
+        key = self._make_key(namespace, key_parts, zip(tags, versions))
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            return cached
+
+        adapter = _get_adapter(response_model)
+        value = adapter.dump_python(
+            adapter.validate_python(await loader(), from_attributes=True), mode="json"
+        )
+        await self.backend.set(key, value, self.ttl)
+        return value
+
+    async def invalidate(self, *tags: str) -> None:
+        """Bumps the tags once the current request transaction is committed."""
+
+        async def bump():
+            await self.backend.bump(list(tags))
+
+        await after_commit(bump)
+
+    @staticmethod
+    def _make_key(namespace: str, key_parts: dict[str, Any], versions: Iterable[tuple[str, int]]) -> str:
+        raw = json.dumps([key_parts, list(versions)], sort_keys=True, default=str)
+        return f"cache:{namespace}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+if settings.CACHE_REDIS_URL:
+    cache_backend: CacheBackend = RedisCacheBackend(settings.CACHE_REDIS_URL)
+else:
+    cache_backend = InMemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(backend=cache_backend, ttl=settings.CACHE_TTL_SECONDS)
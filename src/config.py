@@ -51,10 +51,13 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
 
     PASSWORD_HASH_NAME: str
     PASSWORD_HASH_ITERATIONS: int
     PASSWORD_SALT_SEPARATOR: str
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
 
     CORS_ORIGINS: List[str]
     CORS_ORIGIN_REGEX: str
@@ -68,6 +71,30 @@ class Settings(BaseSettings):
     MIN_PASSWORD_LENGTH: int
     MAX_PASSWORD_LENGTH: int
 
+    CACHE_TTL_SECONDS: int = 30
+    CACHE_MAX_ENTRIES: int = 1024
+    # Shares the response cache between workers; needs the optional redis group (poetry install --with redis)
+    CACHE_REDIS_URL: str | None = None
+
+    USER_CACHE_TTL_SECONDS: int = 10
+    USER_CACHE_MAX_ENTRIES: int = 1024
+
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+
+    PROFILES_DIR: str = "profiles"
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILES_MAX_FILES: int = 100
+
+    IMPORT_BATCH_SIZE: int = 500
+
+    # Patient flag -> regexes matched case-insensitively against record diagnoses
+    DIAGNOSIS_RULES: dict[str, list[str]] = {
+        "dep": [r"\bд[эе]п\b"],
+        "bp": [r"\bбп\b"],
+        "ischemia": [r"\bишемия\b"],
+    }
+    RECLASSIFY_BATCH_SIZE: int = 1000
+
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
 
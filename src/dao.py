@@ -1,13 +1,16 @@
-from typing import Any, Dict, Generic, List, Optional, TypeVar, Union
+import uuid
+from enum import Enum
+from typing import Any, Dict, Generic, List, Optional, Sequence, TypeVar, Union
 
 from fastapi import HTTPException
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import Uuid, delete, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
 
 from .base import Base
-from .database import async_session_maker
+from .database import session_scope
+from .pagination import KeysetPaginator
 
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -18,10 +21,13 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     model = None
 
+    # Batches of this size and larger are loaded with COPY instead of a multi-row INSERT
+    COPY_THRESHOLD: int = 5000
+
     @classmethod
     async def add(cls, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> Optional[ModelType]:
 
-        async with async_session_maker() as db:
+        async with session_scope() as db:
             if isinstance(obj_in, dict):
                 create_data = obj_in
             else:
@@ -30,7 +36,6 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             try:
                 stmt = insert(cls.model).values(**create_data).returning(cls.model)
                 result = await db.execute(stmt)
-                await db.commit()
                 return result.scalars().first()
             except (SQLAlchemyError, Exception) as e:
                 print(e)
@@ -45,10 +50,105 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     msg = "Unknown Exc: Cannot insert data into table"
                 raise HTTPException(status_code=500, detail=msg)
 
+    @classmethod
+    async def add_many(
+        cls, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]], return_ids: bool = False
+    ) -> Optional[List[Any]]:
+        """Inserts many rows in one round trip per batch.
+
+        Moderate batches go through a multi-row executemany INSERT, large ones through
+        asyncpg COPY. Python-side column defaults (e.g. uuid primary keys) are filled in
+        before sending, so generated ids can be returned without RETURNING.
+        """
+        rows = cls._prepare_rows(objs_in)
+        if not rows:
+            return [] if return_ids else None
+
+        pk_name = cls.model.__table__.primary_key.columns.keys()[0]
+        ids_known = pk_name in rows[0]
+
+        async with session_scope() as db:
+            try:
+                if len(rows) >= cls.COPY_THRESHOLD and (ids_known or not return_ids):
+                    await cls._copy_rows(db, rows)
+                elif return_ids and not ids_known:
+                    pk = getattr(cls.model, pk_name)
+                    stmt = insert(cls.model).returning(pk, sort_by_parameter_order=True)
+                    result = await db.execute(stmt, rows)
+                    return list(result.scalars().all())
+                else:
+                    await db.execute(insert(cls.model), rows)
+
+                return [row[pk_name] for row in rows] if return_ids else None
+            except (SQLAlchemyError, Exception) as e:
+                logger.error(e)
+
+                if isinstance(e, SQLAlchemyError):
+                    msg = "Database Exc: Cannot insert data into table"
+                else:
+                    msg = "Unknown Exc: Cannot insert data into table"
+                raise HTTPException(status_code=500, detail=msg)
+
+    @classmethod
+    def _prepare_rows(
+        cls, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        rows = [dict(obj_in) if isinstance(obj_in, dict) else obj_in.model_dump() for obj_in in objs_in]
+        if not rows:
+            return rows
+
+        columns = [
+            column
+            for column in cls.model.__table__.columns
+            if any(column.name in row for row in rows)
+            or (column.default is not None and (column.default.is_scalar or column.default.is_callable))
+        ]
+        for row in rows:
+            for column in columns:
+                if column.name in row:
+                    continue
+                if column.default is None or column.default.is_clause_element:
+                    row[column.name] = None
+                elif column.default.is_callable:
+                    row[column.name] = column.default.arg(None)
+                else:
+                    row[column.name] = column.default.arg
+        return rows
+
+    @classmethod
+    async def _copy_rows(cls, db, rows: List[Dict[str, Any]]) -> None:
+        table = cls.model.__table__
+        columns = list(rows[0].keys())
+        uuid_columns = {name for name in columns if isinstance(table.c[name].type, Uuid)}
+
+        def to_record(row: Dict[str, Any]) -> tuple:
+            record = []
+            for name in columns:
+                value = row[name]
+                if isinstance(value, Enum):
+                    value = value.value
+                elif name in uuid_columns and isinstance(value, str):
+                    value = uuid.UUID(value)
+                record.append(value)
+            return tuple(record)
+
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        # COPY goes to asyncpg directly, bypassing the SQLAlchemy adapter that begins the
+        # transaction lazily on the first statement. Begin it here under the adapter's lock, or a
+        # COPY that opens the session would autocommit and survive a rollback.
+        adapted_connection = raw_connection.dbapi_connection
+        async with adapted_connection._execute_mutex:
+            if not adapted_connection._started:
+                await adapted_connection._start_transaction()
+            await adapted_connection.driver_connection.copy_records_to_table(
+                table.name, records=[to_record(row) for row in rows], columns=columns
+            )
+
     @classmethod
     async def find_one_or_none(cls, *filter, **filter_by) -> Optional[ModelType]:
 
-        async with async_session_maker() as db:
+        async with session_scope() as db:
 
             stmt = select(cls.model).filter(*filter).filter_by(**filter_by)
             result = await db.execute(stmt)
@@ -60,12 +160,31 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         cls, *filter, offset: int | None = None, limit: int | None = None, **filter_by
     ) -> List[ModelType]:
 
-        async with async_session_maker() as db:
+        async with session_scope() as db:
 
             stmt = select(cls.model).filter(*filter).filter_by(**filter_by).offset(offset).limit(limit)
             result = await db.execute(stmt)
             return result.scalars().all()
 
+    @classmethod
+    async def find_page(
+        cls,
+        *filter,
+        cursor: str | None = None,
+        offset: int | None = None,
+        limit: int = 100,
+        order_by: Sequence[tuple[str, bool]] = (),
+        **filter_by,
+    ) -> tuple[List[ModelType], str | None]:
+
+        async with session_scope() as db:
+
+            paginator = KeysetPaginator(cls.model, order_by)
+            stmt = select(cls.model).filter(*filter).filter_by(**filter_by)
+            stmt = paginator.apply(stmt, cursor=cursor, offset=offset, limit=limit)
+            result = await db.execute(stmt)
+            return paginator.page(result.scalars().all(), limit)
+
     @classmethod
     async def update(
         cls,
@@ -73,7 +192,7 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> Optional[ModelType]:
 
-        async with async_session_maker() as db:
+        async with session_scope() as db:
             if isinstance(obj_in, dict):
                 update_data = obj_in
             else:
@@ -81,12 +200,10 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             stmt = update(cls.model).where(*where).values(**update_data).returning(cls.model)
 
             result = await db.execute(stmt)
-            await db.commit()
             return result.scalars().one()
 
     @classmethod
     async def delete(cls, *filter, **filter_by) -> None:
-        async with async_session_maker() as db:
+        async with session_scope() as db:
             stmt = delete(cls.model).filter(*filter).filter_by(**filter_by)
             await db.execute(stmt)
-            await db.commit()
@@ -1,8 +1,14 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
 from sqlalchemy import MetaData, NullPool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from .config import settings
 from .db_convention import DB_NAMING_CONVENTION
+from .metrics import InstrumentedQueuePool, instrument_engine
 
 
 metadata = MetaData(naming_convention=DB_NAMING_CONVENTION)
@@ -13,11 +19,89 @@ if settings.MODE == "TEST":
     DATABASE_PARAMS = {"poolclass": NullPool}
 elif settings.MODE == "PROD":
     DATABASE_URL = settings.PROD_DATABASE_URL
-    DATABASE_PARAMS = {}
+    DATABASE_PARAMS = {"poolclass": InstrumentedQueuePool}
 else:
     DATABASE_URL = settings.DATABASE_URL
-    DATABASE_PARAMS = {"echo": True}
+    DATABASE_PARAMS = {"echo": True, "poolclass": InstrumentedQueuePool}
 
 
 async_engine = create_async_engine(DATABASE_URL, **DATABASE_PARAMS)
+instrument_engine(async_engine)
 async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+
+request_session: ContextVar[AsyncSession | None] = ContextVar("request_session", default=None)
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Opens one session per request: commits once on success, rolls back on unexpected errors.
+
+    Client errors (4xx) are regular service control flow, e.g. an expired refresh token is
+    deleted before TokenExpired is raised, so the work done before them is still committed.
+    """
+    async with async_session_maker() as session:
+        token = request_session.set(session)
+        try:
+            yield session
+            await session.commit()
+            await _run_after_commit(session)
+        except HTTPException as e:
+            if e.status_code < 500:
+                await session.commit()
+                await _run_after_commit(session)
+            else:
+                await session.rollback()
+            raise
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            request_session.reset(token)
+
+
+async def after_commit(callback: Callable[[], Awaitable[None]]) -> None:
+    """Defers the callback until the request transaction is committed, or runs it right away outside one."""
+    session = request_session.get()
+    if session is None:
+        await callback()
+        return
+
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+async def _run_after_commit(session: AsyncSession) -> None:
+    for callback in session.info.pop("after_commit", []):
+        await callback()
+
+
+@asynccontextmanager
+async def transaction_scope() -> AsyncIterator[AsyncSession]:
+    """Runs the block in its own session and transaction, even inside a request.
+
+    DAO calls made in the block use this session; it is committed on exit and its
+    after_commit callbacks run right after, so long jobs can commit in batches.
+    """
+    async with async_session_maker() as session:
+        token = request_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            request_session.reset(token)
+
+    await _run_after_commit(session)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Reuses the request session if there is one, otherwise opens and commits a standalone session."""
+    session = request_session.get()
+    if session is not None:
+        yield session
+        return
+
+    async with async_session_maker() as session:
+        yield session
+        await session.commit()
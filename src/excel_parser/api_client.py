@@ -1,9 +1,10 @@
+import json
 from http.cookies import SimpleCookie
 
 import aiohttp
 from aiohttp import ClientSession
 from constants import BASE_URL, THERAPIST_LOGIN_DATA
-from schemas import PatientBase, PatientRecordsBase
+from schemas import PatientBase, PatientImport, PatientRecordsBase
 
 
 class APIClient:
@@ -29,6 +30,29 @@ class APIClient:
             res_json = await response.json()
             return res_json
 
+    @classmethod
+    async def import_patients(
+        cls, session: ClientSession, cookies: SimpleCookie, patients: list[PatientImport]
+    ):
+        body = "\n".join(
+            json.dumps(patient.model_dump(mode="json"), ensure_ascii=False) for patient in patients
+        )
+        async with session.post(
+            f"{BASE_URL}/patient/import",
+            data=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+            cookies=cookies,
+        ) as response:
+            res_json = await response.json()
+            if response.status != 200:
+                await cls.write_error_to_file(res_json)
+                return None
+
+            for row in res_json["rows"]:
+                if row["error"]:
+                    await cls.write_error_to_file(row)
+            return res_json
+
     @classmethod
     async def write_error_to_file(cls, error_message):
         with open("error_log.txt", "a+") as file:
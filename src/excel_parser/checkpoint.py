@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+
+
+class ImportCheckpoint:
+    """Remembers up to which sheet row an import has been committed by the server.
+
+    Chunks may finish out of order, so the checkpoint only moves past a chunk once every
+    chunk before it has finished too. The file also stores a hash of the workbook, and a
+    checkpoint for a different file is ignored.
+    """
+
+    def __init__(self, path: str, source_hash: str, completed_row: int = 0):
+        self.path = path
+        self.source_hash = source_hash
+        self.completed_row = completed_row
+        self._chunk_ends: dict[int, int] = {}
+        self._done: set[int] = set()
+        self._next_chunk = 0
+
+    @classmethod
+    def load(cls, path: str, source_path: str, resume: bool) -> "ImportCheckpoint":
+        source_hash = file_hash(source_path)
+        if resume and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("source_hash") == source_hash:
+                return cls(path, source_hash, data["completed_row"])
+            print("Checkpoint belongs to another file, starting from the beginning")
+
+        return cls(path, source_hash)
+
+    @property
+    def key_prefix(self) -> str:
+        """Prefix of the idempotency keys of this file's rows; the key is ``<prefix>:<row>``."""
+        return self.source_hash[:16]
+
+    def register_chunk(self, chunk_index: int, last_row: int) -> None:
+        self._chunk_ends[chunk_index] = last_row
+
+    def mark_done(self, chunk_index: int) -> None:
+        self._done.add(chunk_index)
+        advanced = False
+        while self._next_chunk in self._done:
+            self._done.remove(self._next_chunk)
+            self.completed_row = self._chunk_ends.pop(self._next_chunk)
+            self._next_chunk += 1
+            advanced = True
+
+        if advanced:
+            self.save()
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"source_hash": self.source_hash, "completed_row": self.completed_row}, file)
+        os.replace(tmp_path, self.path)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,3 +1,6 @@
+import os
+
+
 THERAPIST_LOGIN_DATA = {"username": "string", "password": "string"}
 EXCEL_FILE_PATH = "C:\\Users\\user\\Desktop\\ключи\\Extrapiramidnaya_Patologia_1.xlsx"
 
@@ -5,6 +8,12 @@ BASE_URL = "http://localhost:8000"  # noqa
 # BASE_URL = "https://clinic.universal-hub.site"  # noqa
 
 CHUNK_SIZE = 300
+MAX_IN_FLIGHT_CHUNKS = 4
+PARSE_WORKERS = os.cpu_count() or 1
+
+CHECKPOINT_FILE_PATH = "import_checkpoint.json"
+# Row error the server reports when it rolled back a whole batch (IMPORT_BATCH_FAILED_ERROR)
+IMPORT_BATCH_FAILED_ERROR = "Batch insert failed"
 
 SECURE_COOKIE = False
 SAMESITE_COOKIE = "Lax"
@@ -1,20 +1,30 @@
 import asyncio
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from http.cookies import BaseCookie
 
 import aiohttp
 from api_client import APIClient, APIFactory
-from constants import BASE_URL, CHUNK_SIZE, EXCEL_FILE_PATH
+from checkpoint import ImportCheckpoint
+from constants import (
+    BASE_URL,
+    CHECKPOINT_FILE_PATH,
+    CHUNK_SIZE,
+    EXCEL_FILE_PATH,
+    IMPORT_BATCH_FAILED_ERROR,
+    MAX_IN_FLIGHT_CHUNKS,
+    PARSE_WORKERS,
+)
 from openpyxl import load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
-from schemas import PatientBase, PatientRecordsBase
+from schemas import PatientImport, PatientRecordImport
 
 
 class DataParser:
 
     @staticmethod
-    async def parse_birthday(birthday: str) -> str:
+    def parse_birthday(birthday: str) -> str:
         if isinstance(birthday, datetime):
             return birthday.date().isoformat()
         elif birthday in (None, "-", "нет даты"):
@@ -26,105 +36,218 @@ class DataParser:
                 return None
 
     @staticmethod
-    async def parse_living_place(living_place: str) -> str | None:
+    def parse_living_place(living_place: str) -> str | None:
         return living_place.strip() if living_place else None
 
     @staticmethod
-    async def parse_diagnosis(diagnosis: str | None) -> tuple[bool, bool, bool]:
-        return (
-            await DataParser.check_diagnosis(diagnosis, r"\bд[эе]п\b"),
-            await DataParser.check_diagnosis(diagnosis, r"\bбп\b"),
-            await DataParser.check_diagnosis(diagnosis, r"\bишемия\b"),
-        )
-
-    @staticmethod
-    async def check_diagnosis(diagnosis: str | None, pattern: str) -> bool:
-        return bool(re.search(pattern, diagnosis, flags=re.IGNORECASE)) if diagnosis else False
-
-    @staticmethod
-    async def determine_inhabited_locality(living_place: str) -> str:
+    def determine_inhabited_locality(living_place: str) -> str:
         if living_place and living_place.strip().startswith(("г", "Г")):
             return "Город"
         return "Село" if living_place else "Неопределено"
 
 
-class RowProcessor:
+class StageStats:
+    """Rows handled by one pipeline stage and the time between its first and last row."""
 
-    @classmethod
-    async def process_row(cls, row: tuple[str], cookies: BaseCookie, session: aiohttp.ClientSession) -> None:
-        try:
-            diagnosis = row[7]
-            birthday = await DataParser.parse_birthday(row[2])
-            living_place = await DataParser.parse_living_place(row[5])
-            first_visit, last_visit = str(row[9]), str(row[8])
-            treatment = row[10]
-            dep, bp, ischemia = await DataParser.parse_diagnosis(diagnosis)
-            inhabited_locality = await DataParser.determine_inhabited_locality(living_place)
-
-            patient_data = PatientBase(
-                full_name=row[0],
-                birthday=birthday,
-                gender=row[1],
-                job_title=row[6],
-                living_place=living_place,
-                inhabited_locality=inhabited_locality,
-                dep=dep,
-                bp=bp,
-                ischemia=ischemia,
-            )
-            response = await APIClient.create_patient(session, cookies, patient_data)
-            patient_id = response["id"]
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
 
-            first_patient_record_data = PatientRecordsBase(
-                visit=first_visit, diagnosis=diagnosis, treatment=treatment, patient_id=patient_id
-            )
+    def add(self, rows: int, started_at: float) -> None:
+        self.rows += rows
+        self.started_at = started_at if self.started_at is None else min(self.started_at, started_at)
+        self.finished_at = time.perf_counter()
 
-            last_patient_record_data = PatientRecordsBase(
-                visit=last_visit, diagnosis=diagnosis, treatment=treatment, patient_id=patient_id
-            )
+    def __str__(self) -> str:
+        elapsed = (self.finished_at - self.started_at) if self.started_at is not None else 0
+        rate = self.rows / elapsed if elapsed else 0
+        return f"{self.name}: {self.rows} rows in {elapsed:.1f}s, {rate:.0f} rows/s"
 
-            await asyncio.gather(
-                APIClient.create_patient_record(session, cookies, first_patient_record_data),
-                APIClient.create_patient_record(session, cookies, last_patient_record_data),
-            )
 
+def parse_rows(
+    rows: list[tuple[int, tuple]], key_prefix: str
+) -> tuple[list[PatientImport], list[dict[str, int | str]]]:
+    """Parses a chunk of sheet rows. Runs in a worker process.
+
+    Returns the parsed patients and the sheet rows that could not be parsed.
+    """
+    patients, failed_rows = [], []
+    for row_number, row in rows:
+        try:
+            patient = RowProcessor.parse_row(row)
         except Exception as e:
-            print(e)
+            failed_rows.append({"row": row_number, "error": f"Failed to parse row: {e!r}"})
+            continue
+
+        patient.import_key = f"{key_prefix}:{row_number}"
+        patients.append(patient)
+    return patients, failed_rows
+
+
+class RowProcessor:
+
+    @classmethod
+    def parse_row(cls, row: tuple[str]) -> PatientImport:
+        diagnosis = row[7]
+        birthday = DataParser.parse_birthday(row[2])
+        living_place = DataParser.parse_living_place(row[5])
+        first_visit, last_visit = str(row[9]), str(row[8])
+        treatment = row[10]
+        inhabited_locality = DataParser.determine_inhabited_locality(living_place)
+
+        first_patient_record_data = PatientRecordImport(
+            visit=first_visit, diagnosis=diagnosis, treatment=treatment
+        )
+        last_patient_record_data = PatientRecordImport(
+            visit=last_visit, diagnosis=diagnosis, treatment=treatment
+        )
+
+        return PatientImport(
+            full_name=row[0],
+            birthday=birthday,
+            gender=row[1],
+            job_title=row[6],
+            living_place=living_place,
+            inhabited_locality=inhabited_locality,
+            # dep/bp/ischemia are derived from the records' diagnoses by the server
+            records=[first_patient_record_data, last_patient_record_data],
+        )
 
     @classmethod
     async def parse_excel_sheet(
-        cls, sheet: Worksheet, cookies: BaseCookie, session: aiohttp.ClientSession
+        cls,
+        sheet: Worksheet,
+        cookies: BaseCookie,
+        session: aiohttp.ClientSession,
+        checkpoint: ImportCheckpoint,
     ) -> None:
+        """Runs the import as three concurrent stages: read -> parse (process pool) -> upload.
+
+        Both hand-offs are bounded, so the reader pauses while the parsers or the uploaders
+        are behind and memory stays flat on any sheet size.
+        """
         try:
             start_time = datetime.now()
-            chunk = CHUNK_SIZE
-            tasks = []
-            pended = 0
-
-            for _, row in enumerate(sheet.iter_rows(min_row=2, max_row=5337, values_only=True), start=1):
-                tasks.append(asyncio.create_task(cls.process_row(row, cookies, session)))
-                pended += 1
-                if len(tasks) == chunk or pended == 5337:
-                    print(pended)
-                    await asyncio.gather(*tasks)
-                    tasks = []
+            stats = [StageStats("read"), StageStats("parse"), StageStats("upload")]
+            read_stats, parse_stats, upload_stats = stats
+
+            upload_queue: asyncio.Queue[tuple[int, list[PatientImport]] | None] = asyncio.Queue(
+                maxsize=MAX_IN_FLIGHT_CHUNKS
+            )
+            uploaders = [
+                asyncio.create_task(
+                    cls.upload_chunks(upload_queue, cookies, session, checkpoint, upload_stats)
+                )
+                for _ in range(MAX_IN_FLIGHT_CHUNKS)
+            ]
+            if checkpoint.completed_row:
+                print(f"Resuming after row {checkpoint.completed_row}")
+
+            with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+                # Two chunks per worker keep every process busy without reading far ahead
+                parse_slots = asyncio.Semaphore(PARSE_WORKERS * 2)
+                parsers = []
+
+                async def submit(chunk_index: int, chunk: list[tuple[int, tuple]], last_row: int) -> None:
+                    await parse_slots.acquire()
+                    checkpoint.register_chunk(chunk_index, last_row)
+                    parser = asyncio.create_task(
+                        cls.parse_chunk(executor, chunk_index, chunk, checkpoint, upload_queue, parse_stats)
+                    )
+                    parser.add_done_callback(lambda _: parse_slots.release())
+                    parsers.append(parser)
+
+                chunk = []
+                chunk_index = 0
+                row_number = 0
+                read_started_at = time.perf_counter()
+                for row_number, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+                    if row_number <= checkpoint.completed_row or all(cell is None for cell in row):
+                        continue
+
+                    chunk.append((row_number, row))
+                    if len(chunk) == CHUNK_SIZE:
+                        read_stats.add(len(chunk), read_started_at)
+                        await submit(chunk_index, chunk, row_number)
+                        chunk = []
+                        chunk_index += 1
+                        read_started_at = time.perf_counter()
+
+                if chunk:
+                    read_stats.add(len(chunk), read_started_at)
+                    await submit(chunk_index, chunk, row_number)
+
+                await asyncio.gather(*parsers)
+
+            for _ in uploaders:
+                await upload_queue.put(None)
+            await asyncio.gather(*uploaders)
 
             end_time = datetime.now()
             print("Processing time:", end_time - start_time)
+            for stage in stats:
+                print(stage)
 
         except Exception as e:
             print(e)
 
+    @staticmethod
+    async def parse_chunk(
+        executor: ProcessPoolExecutor,
+        chunk_index: int,
+        rows: list[tuple[int, tuple]],
+        checkpoint: ImportCheckpoint,
+        upload_queue: asyncio.Queue,
+        stats: StageStats,
+    ) -> None:
+        started_at = time.perf_counter()
+        patients, failed_rows = await asyncio.get_running_loop().run_in_executor(
+            executor, parse_rows, rows, checkpoint.key_prefix
+        )
+        # The checkpoint moves past these rows, so error_log.txt is their only record
+        for failed_row in failed_rows:
+            await APIClient.write_error_to_file(failed_row)
+        stats.add(len(rows), started_at)
+        await upload_queue.put((chunk_index, patients))
+
+    @staticmethod
+    async def upload_chunks(
+        queue: asyncio.Queue,
+        cookies: BaseCookie,
+        session: aiohttp.ClientSession,
+        checkpoint: ImportCheckpoint,
+        stats: StageStats,
+    ) -> None:
+        while (item := await queue.get()) is not None:
+            chunk_index, chunk = item
+            started_at = time.perf_counter()
+            try:
+                result = await APIClient.import_patients(session, cookies, chunk)
+                if result is None:
+                    continue
+                # Rolled back rows are not committed, so the checkpoint must not move past them
+                if any(row["error"] == IMPORT_BATCH_FAILED_ERROR for row in result["rows"]):
+                    print(f"Chunk {chunk_index} was not stored and will be retried by --resume")
+                    continue
+
+                checkpoint.mark_done(chunk_index)
+                stats.add(len(chunk), started_at)
+            except Exception as e:
+                print(e)
+
     @classmethod
-    async def authenticate_and_process(cls) -> None:
+    async def authenticate_and_process(cls, resume: bool = False) -> None:
         async with await APIFactory.create_session() as session:
             cookies = await APIClient.authenticate(session)
             if not cookies:
                 print({"message": "Failed to authenticate"})
             cookies = cls.get_cookies(session)
-            wb = load_workbook(EXCEL_FILE_PATH)
+            checkpoint = ImportCheckpoint.load(CHECKPOINT_FILE_PATH, EXCEL_FILE_PATH, resume)
+            wb = load_workbook(EXCEL_FILE_PATH, read_only=True)
             sheet = wb["Лист1"]
-            await cls.parse_excel_sheet(sheet, cookies, session)
+            await cls.parse_excel_sheet(sheet, cookies, session, checkpoint)
             wb.close()
 
     @staticmethod
@@ -135,5 +258,5 @@ class RowProcessor:
 class ExcelParser:
 
     @classmethod
-    async def process_excel_file(cls) -> None:
-        await RowProcessor.authenticate_and_process()
+    async def process_excel_file(cls, resume: bool = False) -> None:
+        await RowProcessor.authenticate_and_process(resume)
@@ -1,11 +1,16 @@
+import argparse
 import asyncio
 
 from excel_parser import ExcelParser
 
 
-async def main():
-    await ExcelParser.process_excel_file()
+async def main(resume: bool):
+    await ExcelParser.process_excel_file(resume)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    arg_parser = argparse.ArgumentParser(description="Import patients from the Excel workbook")
+    arg_parser.add_argument(
+        "--resume", action="store_true", help="skip rows committed by a previous run of the same file"
+    )
+    asyncio.run(main(arg_parser.parse_args().resume))
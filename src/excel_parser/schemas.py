@@ -16,6 +16,17 @@ class PatientBase(BaseModel):
     dep: bool = False
 
 
+class PatientRecordImport(BaseModel):
+    visit: str | None = None
+    diagnosis: str | None = None
+    treatment: str | None = None
+
+
+class PatientImport(PatientBase):
+    import_key: str | None = None
+    records: list[PatientRecordImport] = []
+
+
 class PatientRecordsBase(BaseModel):
     visit: str | None = None
     diagnosis: str | None = None
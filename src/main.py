@@ -1,20 +1,30 @@
+import asyncio
+import contextlib
+import sys
+import uuid
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse
 from loguru import logger
 from sqladmin import Admin
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from src.admin.admin import authentication_backend
 from src.admin.views import PatientAdmin, PatientRecordAdmin, UserAdmin
 from src.auth.routers import auth_router, user_router
+from src.auth.service import AuthService
 from src.patient.routers import patient_router
 from src.patient_records.routers import patient_records_router
 
 from .config import settings
-from .database import async_engine
+from .database import async_engine, get_async_session
+from .metrics import MetricsMiddleware, registry
+from .middleware import LoggingMiddleware
+from .profiling import ProfilingMiddleware, get_profile_path
 from .utils import get_api_key
 
 
@@ -24,26 +34,49 @@ from .utils import get_api_key
 #     profiles_sample_rate=1.0,
 # )
 
-app = FastAPI(docs_url=None, redoc_url=None, title="Clinic")
 
-app.include_router(auth_router, tags=["AUTH"])
-app.include_router(user_router, tags=["USER"])
-app.include_router(patient_router, tags=["PATIENT"])
-app.include_router(patient_records_router, tags=["PATIENT RECORDS"])
+async def purge_refresh_tokens_periodically():
+    while True:
+        await asyncio.sleep(settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+        try:
+            await AuthService.purge_expired_refresh_tokens()
+        except Exception:
+            # Already logged by the service; try again on the next tick
+            pass
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    purge_task = None
+    if settings.MODE != "TEST" and settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        purge_task = asyncio.create_task(purge_refresh_tokens_periodically())
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        logger.info(f"Входящий запрос: {request.method} {request.url}")
+    yield
 
-        response = await call_next(request)
+    if purge_task is not None:
+        purge_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await purge_task
 
-        logger.info(f"Исходящий ответ: {response.status_code}")
+    await logger.complete()
 
-        return response
 
+app = FastAPI(
+    docs_url=None,
+    redoc_url=None,
+    title="Clinic",
+    dependencies=[Depends(get_async_session)],
+    lifespan=lifespan,
+)
+
+app.include_router(auth_router, tags=["AUTH"])
+app.include_router(user_router, tags=["USER"])
+app.include_router(patient_router, tags=["PATIENT"])
+app.include_router(patient_records_router, tags=["PATIENT RECORDS"])
 
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware, router=app.router)
+app.add_middleware(ProfilingMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,21 +93,52 @@ async def get_docs(api_key: str = Depends(get_api_key)):
     return get_swagger_ui_html(openapi_url="/openapi.json", title="Документация АПИ клиники")
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(api_key: str = Depends(get_api_key)):
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/secure/profiles/{profile_id}", response_class=FileResponse, include_in_schema=False)
+async def get_profile(profile_id: uuid.UUID, api_key: str = Depends(get_api_key)):
+    # FileResponse streams the file from a worker thread, so the event loop never blocks on disk
+    path = get_profile_path(profile_id)
+    if not await run_in_threadpool(path.is_file):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
+
+
 if settings.MODE != "TEST":
+    # Sinks write from a background thread (enqueue=True) so disk I/O never blocks the event loop
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True)
+
     logger.add(
         "critical_logs.log",
         format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
         encoding="utf-8",
+        enqueue=True,
         level="CRITICAL",
         filter=lambda record: record["level"].name == "CRITICAL",
     )
 
+    logger.add(
+        "warning_logs.log",
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+        encoding="utf-8",
+        rotation="500 MB",
+        retention="7 days",
+        enqueue=True,
+        level="WARNING",
+        filter=lambda record: record["level"].name in ("WARNING", "ERROR"),
+    )
+
     logger.add(
         "common_logs.log",
         format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
         encoding="utf-8",
         rotation="500 MB",
         retention="7 days",
+        enqueue=True,
         level="INFO",
         filter=lambda record: record["level"].name == "INFO",
     )
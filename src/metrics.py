@@ -0,0 +1,255 @@
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth.utils import get_hashing_stats
+from .config import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# A single-quoted SQL string, with '' as an escaped quote
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+class Histogram:
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+@dataclass
+class RequestMetrics:
+    """Per-request counters, reachable from anywhere in the request through ``current_request``."""
+
+    route: str
+    db_queries: int = 0
+    db_time: float = 0.0
+
+
+current_request: ContextVar[RequestMetrics | None] = ContextVar("current_request", default=None)
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)
+        self.latency: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.in_flight: dict[tuple[str, str], int] = defaultdict(int)
+        self.db_queries: dict[str, int] = defaultdict(int)
+        self.db_time: dict[str, float] = defaultdict(float)
+        self.pool_wait = Histogram()
+        self.engine: AsyncEngine | None = None
+
+    def observe_query(self, duration: float, statement: str, parameters) -> None:
+        request = current_request.get()
+        route = request.route if request is not None else UNMATCHED_ROUTE
+        if request is not None:
+            request.db_queries += 1
+            request.db_time += duration
+
+        self.db_queries[route] += 1
+        self.db_time[route] += duration
+
+        duration_ms = round(duration * 1000, 2)
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.bind(route=route, duration_ms=duration_ms, params=_redact(parameters)).warning(
+                f"Медленный запрос ({duration_ms} мс) в {route}: {_strip_literals(statement)}"
+            )
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        lines += _header("http_requests_total", "counter", "Handled HTTP requests.")
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += _header("http_request_duration_seconds", "histogram", "HTTP request latency.")
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines += _histogram("http_request_duration_seconds", histogram, method=method, route=route)
+
+        lines += _header("http_requests_in_flight", "gauge", "HTTP requests being handled.")
+        for (method, route), count in sorted(self.in_flight.items()):
+            lines.append(f"http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+        lines += _header("db_queries_total", "counter", "SQL statements executed, by route.")
+        for route, count in sorted(self.db_queries.items()):
+            lines.append(f"db_queries_total{_labels(route=route)} {count}")
+
+        lines += _header(
+            "db_query_duration_seconds_total", "counter", "Time spent in SQL statements, by route."
+        )
+        for route, total in sorted(self.db_time.items()):
+            lines.append(f"db_query_duration_seconds_total{_labels(route=route)} {total:.6f}")
+
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            lines += _header("db_pool_size", "gauge", "Configured pool size.")
+            lines.append(f"db_pool_size {pool.size()}")
+            lines += _header("db_pool_checked_out", "gauge", "Connections currently checked out.")
+            lines.append(f"db_pool_checked_out {pool.checkedout()}")
+            lines += _header("db_pool_overflow", "gauge", "Connections opened beyond the pool size.")
+            lines.append(f"db_pool_overflow {pool.overflow()}")
+
+        lines += _header("db_pool_wait_seconds", "histogram", "Time spent waiting for a pool connection.")
+        lines += _histogram("db_pool_wait_seconds", self.pool_wait)
+
+        hashing = get_hashing_stats()
+        lines += _header("password_hash_queued", "gauge", "Password hashes waiting for a worker.")
+        lines.append(f"password_hash_queued {hashing['queued']}")
+        lines += _header("password_hash_running", "gauge", "Password hashes being computed.")
+        lines.append(f"password_hash_running {hashing['running']}")
+        lines += _header("password_hash_completed_total", "counter", "Password hashes computed.")
+        lines.append(f"password_hash_completed_total {hashing['completed']}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.pool_wait.observe(time.perf_counter() - started_at)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attributes every SQL statement run on the engine to the current request's route and logs slow ones."""
+    registry.engine = engine
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        registry.observe_query(
+            time.perf_counter() - conn.info["query_started_at"].pop(), statement, parameters
+        )
+
+    # A failed statement never reaches after_cursor_execute, so its start time is popped here;
+    # otherwise the list would grow for the life of the pooled connection
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started_at") if context.connection else None
+        if context.execution_context is not None and started:
+            registry.observe_query(time.perf_counter() - started.pop(), context.statement, context.parameters)
+
+
+class MetricsMiddleware:
+    """Counts requests, their latency and how many are in flight, labelled by route template.
+
+    The route is resolved up front against the app routes, so ids in the path do not turn
+    into separate label values.
+    """
+
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._resolve_route(scope)
+        request = RequestMetrics(route=route)
+        token = current_request.set(request)
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                server_timing = f'db;desc="{request.db_queries} queries";dur={request.db_time * 1000:.2f}'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        registry.in_flight[(method, route)] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight[(method, route)] -= 1
+            registry.requests[(method, route, status_code)] += 1
+            registry.latency[(method, route)].observe(time.perf_counter() - started_at)
+            current_request.reset(token)
+
+    def _resolve_route(self, scope: Scope) -> str:
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", None)
+        return partial or UNMATCHED_ROUTE
+
+
+def _strip_literals(statement: str) -> str:
+    """Masks string literals, e.g. values SQLAlchemy rendered inline with literal_execute."""
+    return _STRING_LITERAL.sub("'?'", statement)
+
+
+def _redact(parameters):
+    """Keeps the shape of statement parameters but replaces every value with its type name."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the first row is enough to show the shape
+            return [_redact(parameters[0]), f"... {len(parameters)} rows"]
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _header(name: str, kind: str, description: str) -> list[str]:
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram(name: str, histogram: Histogram, **labels) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+    return lines
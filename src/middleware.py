@@ -0,0 +1,45 @@
+import time
+
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import current_request
+
+
+class LoggingMiddleware:
+    """Logs every HTTP request with its method, path, status and duration.
+
+    Implemented as plain ASGI so the response body is streamed straight through instead of
+    being relayed via an extra task and memory stream as BaseHTTPMiddleware does.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = round((time.perf_counter() - started_at) * 1000, 2)
+            request = current_request.get()
+            db_queries = request.db_queries if request is not None else 0
+            logger.bind(
+                method=scope["method"],
+                path=scope["path"],
+                status=status_code,
+                duration_ms=duration_ms,
+                db_queries=db_queries,
+            ).info(f"{scope['method']} {scope['path']} -> {status_code} ({duration_ms} мс, {db_queries} SQL)")
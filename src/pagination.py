@@ -0,0 +1,112 @@
+import base64
+import datetime
+import json
+import uuid
+from typing import Any, Generic, Sequence, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, Select, Uuid, and_, false, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from .base import Base
+
+
+ItemType = TypeVar("ItemType")
+
+
+class Page(BaseModel, Generic[ItemType]):
+    items: list[ItemType]
+    next_cursor: str | None = None
+
+
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Invalid pagination cursor")
+
+
+class KeysetPaginator:
+    """Keyset (cursor) pagination over the requested sort columns plus ``id`` as a tiebreaker.
+
+    The cursor is an opaque base64 token holding the sort key of the last row of a page, so the
+    next page is found with an index range condition instead of ``OFFSET``. When no cursor is
+    given, ``offset`` is still honoured as a fallback.
+    """
+
+    def __init__(self, model: type[Base], order_by: Sequence[tuple[str, bool]] = ()):
+        self.model = model
+        self.keys: list[tuple[str, bool]] = [(field, is_desc) for field, is_desc in order_by if field != "id"]
+        self.keys.append(("id", False))
+
+    def apply(self, stmt: Select, cursor: str | None, offset: int | None, limit: int) -> Select:
+        for field, is_desc in self.keys:
+            column = getattr(self.model, field)
+            stmt = stmt.order_by(column.desc() if is_desc else column.asc())
+
+        if cursor:
+            stmt = stmt.where(self._after(self._decode(cursor)))
+        elif offset:
+            stmt = stmt.offset(offset)
+
+        return stmt.limit(limit + 1)
+
+    def page(self, rows: Sequence[Any], limit: int, key=lambda row: row) -> tuple[list[Any], str | None]:
+        rows = list(rows)
+        if len(rows) <= limit:
+            return rows, None
+
+        rows = rows[:limit]
+        if not rows:
+            # limit <= 0 asks for an empty page; there is no last row to continue after
+            return rows, None
+        last = key(rows[-1])
+        return rows, self._encode([getattr(last, field) for field, _ in self.keys])
+
+    def _after(self, values: list[Any]) -> ColumnElement:
+        conditions = []
+        equal_so_far = []
+        for (field, is_desc), value in zip(self.keys, values):
+            column = getattr(self.model, field)
+            nullable = self.model.__table__.c[field].nullable
+            conditions.append(and_(*equal_so_far, self._greater(column, value, is_desc, nullable)))
+            equal_so_far.append(column.is_(None) if value is None else column == value)
+        return or_(*conditions)
+
+    @staticmethod
+    def _greater(column: ColumnElement, value: Any, is_desc: bool, nullable: bool) -> ColumnElement:
+        # Postgres puts NULLs last in ascending order and first in descending order
+        if is_desc:
+            return column.is_not(None) if value is None else column < value
+        if value is None:
+            return false()
+        return or_(column > value, column.is_(None)) if nullable else column > value
+
+    def _encode(self, values: list[Any]) -> str:
+        payload = {"k": [[field, is_desc] for field, is_desc in self.keys], "v": values}
+        raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def _decode(self, cursor: str) -> list[Any]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if [tuple(key) for key in payload["k"]] != self.keys:
+                raise InvalidCursor
+            return [
+                self._parse(field, value) for (field, _), value in zip(self.keys, payload["v"], strict=True)
+            ]
+        except InvalidCursor:
+            raise
+        except Exception as e:
+            raise InvalidCursor from e
+
+    def _parse(self, field: str, value: Any) -> Any:
+        if value is None:
+            return None
+        column_type = getattr(self.model, field).type
+        if isinstance(column_type, Uuid):
+            return uuid.UUID(value)
+        if isinstance(column_type, DateTime):
+            return datetime.datetime.fromisoformat(value)
+        if isinstance(column_type, Date):
+            return datetime.date.fromisoformat(value)
+        return value
@@ -0,0 +1,42 @@
+import re
+from typing import Iterable
+
+from sqlalchemy import Boolean
+
+from ..config import settings
+from .models import Patient
+
+
+class DiagnosisClassifier:
+    """Derives patient cohort flags from free-text diagnoses.
+
+    Every flag has its own compiled pattern, so flags whose patterns match overlapping text are
+    all set. Each text is searched on its own, so anchors, lookarounds and whitespace in the
+    configured rules never see a neighbouring row and a batch gives the same flags as single texts.
+    """
+
+    # Joins the diagnoses of one patient's records into the text that is classified
+    SEPARATOR = "\n"
+
+    def __init__(self, rules: dict[str, list[str]]):
+        self.flags = tuple(rules)
+        self.patterns = {
+            flag: re.compile("|".join(f"(?:{p})" for p in patterns), flags=re.IGNORECASE)
+            for flag, patterns in rules.items()
+        }
+
+    def classify(self, diagnosis: str | None) -> dict[str, bool]:
+        text = diagnosis or ""
+        return {flag: pattern.search(text) is not None for flag, pattern in self.patterns.items()}
+
+    def classify_many(self, diagnoses: Iterable[str | None]) -> list[dict[str, bool]]:
+        return [self.classify(diagnosis) for diagnosis in diagnoses]
+
+
+diagnosis_classifier = DiagnosisClassifier(settings.DIAGNOSIS_RULES)
+
+_unknown_flags = set(diagnosis_classifier.flags) - {
+    column.name for column in Patient.__table__.columns if isinstance(column.type, Boolean)
+}
+if _unknown_flags:
+    raise ValueError(f"DIAGNOSIS_RULES reference unknown patient flags: {sorted(_unknown_flags)}")
@@ -1,7 +1,108 @@
+import uuid
+from typing import Sequence
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 from ..dao import BaseDAO
-from .models import Patient
+from ..database import session_scope
+from ..patient_records.models import PatientRecord
+from .models import Patient, PatientStatistic
 from .schemas import PatientCreateDB, PatientUpdate
 
 
 class PatientDAO(BaseDAO[Patient, PatientCreateDB, PatientUpdate]):
     model = Patient
+
+    @classmethod
+    async def find_diagnoses_page(
+        cls, flags: Sequence[str], after_id: uuid.UUID | None, limit: int
+    ) -> Sequence[Row]:
+        """Returns patients that have records, by id, with their flags and all diagnoses joined by newlines."""
+        stmt = (
+            select(
+                Patient.id,
+                *(getattr(Patient, flag) for flag in flags),
+                func.string_agg(PatientRecord.diagnosis, "\n").label("diagnoses"),
+            )
+            .join(PatientRecord, PatientRecord.patient_id == Patient.id)
+            .group_by(Patient.id)
+            .order_by(Patient.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(Patient.id > after_id)
+
+        async with session_scope() as db:
+            result = await db.execute(stmt)
+            return result.all()
+
+    @classmethod
+    async def update_many(cls, rows: list[dict]) -> None:
+        """Updates patients by primary key in one executemany; every row needs an ``id``."""
+        async with session_scope() as db:
+            await db.execute(update(Patient), rows)
+
+    @classmethod
+    async def find_ids_by_import_keys(
+        cls, therapist_id: uuid.UUID, import_keys: list[str]
+    ) -> dict[str, uuid.UUID]:
+        stmt = select(Patient.import_key, Patient.id).where(
+            Patient.therapist_id == therapist_id, Patient.import_key.in_(import_keys)
+        )
+        async with session_scope() as db:
+            result = await db.execute(stmt)
+            return dict(result.tuples().all())
+
+
+class PatientStatisticDAO(BaseDAO[PatientStatistic, PatientStatistic, PatientStatistic]):
+    model = PatientStatistic
+
+    COUNTERS = ("bp", "dep", "ischemia", "city", "district", "male", "female")
+
+    @staticmethod
+    def count_columns() -> list:
+        return [
+            func.count().filter(Patient.bp == True).label("bp"),
+            func.count().filter(Patient.dep == True).label("dep"),
+            func.count().filter(Patient.ischemia == True).label("ischemia"),
+            func.count().filter(func.lower(Patient.inhabited_locality).contains("город")).label("city"),
+            func.count().filter(func.lower(Patient.inhabited_locality).contains("село")).label("district"),
+            func.count().filter(func.lower(Patient.gender) == "м").label("male"),
+            func.count().filter(func.lower(Patient.gender) == "ж").label("female"),
+        ]
+
+    @classmethod
+    def total_columns(cls) -> list:
+        return [func.coalesce(func.sum(getattr(cls.model, name)), 0).label(name) for name in cls.COUNTERS]
+
+    @classmethod
+    async def add_delta(cls, therapist_id: uuid.UUID, delta: dict[str, int]) -> None:
+        if not any(delta.values()):
+            return
+
+        stmt = pg_insert(cls.model).values(therapist_id=therapist_id, **delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.model.therapist_id],
+            set_={name: getattr(cls.model, name) + stmt.excluded[name] for name in delta},
+        )
+        async with session_scope() as db:
+            await db.execute(stmt)
+
+    @classmethod
+    async def get_totals(cls, *filter, **filter_by) -> dict[str, int]:
+        stmt = select(*cls.total_columns()).filter(*filter).filter_by(**filter_by)
+        async with session_scope() as db:
+            result = await db.execute(stmt)
+            return {name: int(value) for name, value in result.one()._mapping.items()}
+
+    @classmethod
+    async def rebuild(cls) -> None:
+        async with session_scope() as db:
+            await db.execute(delete(cls.model))
+            await db.execute(
+                insert(cls.model).from_select(
+                    ["therapist_id", *cls.COUNTERS],
+                    select(Patient.therapist_id, *cls.count_columns()).group_by(Patient.therapist_id),
+                )
+            )
@@ -2,7 +2,7 @@ import uuid
 from datetime import date
 from typing import Annotated
 
-from sqlalchemy import UUID, Date, ForeignKey, false
+from sqlalchemy import DDL, UUID, Date, ForeignKey, Index, event, false, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..base import Base, BaseIDMixin
@@ -26,10 +26,61 @@ class Patient(Base, BaseIDMixin):
     ischemia: Mapped[bool] = mapped_column(default=False, server_default=false())
     dep: Mapped[bool] = mapped_column(default=False, server_default=false())
 
-    therapist_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id", ondelete="CASCADE"))
+    therapist_id: Mapped[uuid.UUID] = mapped_column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+
+    # Idempotency key of the import row the patient came from, unique per therapist
+    import_key: Mapped[str_null]
 
     records: Mapped[list["PatientRecord"]] = relationship("PatientRecord", back_populates="patient")
     therapist = relationship("User", back_populates="patients")
 
     def __str__(self):
         return self.full_name
+
+
+TEXT_SEARCH_COLUMNS = ("full_name", "living_place", "job_title", "inhabited_locality")
+
+event.listen(Patient.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+# ILIKE '%...%' filters use the trigram indexes, equality and prefix filters on lower() the B-tree ones
+for _name in TEXT_SEARCH_COLUMNS:
+    Index(
+        f"ix_patients_{_name}_trgm",
+        Patient.__table__.c[_name],
+        postgresql_using="gin",
+        postgresql_ops={_name: "gin_trgm_ops"},
+    )
+    Index(
+        f"ix_patients_{_name}_lower",
+        func.lower(Patient.__table__.c[_name]).label(f"{_name}_lower"),
+        postgresql_ops={f"{_name}_lower": "text_pattern_ops"},
+    )
+
+
+Index(
+    "ix_patients_therapist_id_import_key",
+    Patient.__table__.c.therapist_id,
+    Patient.__table__.c.import_key,
+    unique=True,
+)
+
+
+counter = Annotated[int, mapped_column(nullable=False, default=0, server_default=text("0"))]
+
+
+class PatientStatistic(Base):
+    """Precomputed patient counters per therapist, kept in sync by PatientService."""
+
+    therapist_id: Mapped[uuid.UUID] = mapped_column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    bp: Mapped[counter]
+    dep: Mapped[counter]
+    ischemia: Mapped[counter]
+    city: Mapped[counter]
+    district: Mapped[counter]
+    male: Mapped[counter]
+    female: Mapped[counter]
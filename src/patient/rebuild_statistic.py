@@ -0,0 +1,11 @@
+import asyncio
+
+from src.patient.service import PatientService
+
+
+async def main():
+    await PatientService.rebuild_statistic()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,8 +1,11 @@
-from async_lru import alru_cache
-from fastapi import APIRouter, Depends
+import uuid
+
+from fastapi import APIRouter, Depends, Request
 
 from ..auth.dependencies import get_current_superuser
 from ..auth.models import User
+from ..cache import response_cache
+from ..pagination import Page
 from . import schemas
 from .dependencies import get_current_therapist, get_current_user
 from .service import PatientService
@@ -16,39 +19,70 @@ async def create_patient(patient_data: schemas.PatientCreate, user: User = Depen
     return await PatientService.create_patient(patient_data=patient_data, user=user)
 
 
-@alru_cache
+@patient_router.post("/import", response_model=schemas.PatientImportOut)
+async def import_patients(request: Request, user: User = Depends(get_current_therapist)):
+    """Imports patients with their records from an NDJSON body, one PatientImport per line."""
+    return await PatientService.import_patients(request.stream(), user=user)
+
+
 @patient_router.get("/get", response_model=schemas.Patient | dict)
-async def get_patient(patient_id: str, user: User = Depends(get_current_therapist)):
-    return await PatientService.get_patient(patient_id=patient_id, user=user)
+async def get_patient(patient_id: uuid.UUID, user: User = Depends(get_current_therapist)):
+    return await response_cache.get_or_set(
+        "patient",
+        {"role": user.role, "patient_id": patient_id},
+        tags=["patients:all", f"patient:{patient_id}"],
+        loader=lambda: PatientService.get_patient(patient_id=patient_id, user=user),
+        response_model=schemas.Patient | dict,
+    )
 
 
-@alru_cache
 @patient_router.post("/get_all")
 async def get_all_patients(
     filters: list[schemas.GetFilters] | None = None,
     sorting_rules: list[schemas.GetSorting] | None = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: str | None = None,
     user: User = Depends(get_current_user),
     global_rule: schemas.GlobalRule = "every",
 ) -> schemas.GetAllPatientsOut:
-    return await PatientService.get_all_patients(
-        user=user,
-        offset=offset,
-        limit=limit,
-        filters=filters,
-        global_rule=global_rule,
-        sorting_rules=sorting_rules,
+    return await response_cache.get_or_set(
+        "patients",
+        {
+            "role": user.role,
+            "filters": [f.model_dump() for f in filters or []],
+            "sorting_rules": [rule.model_dump(mode="json") for rule in sorting_rules or []],
+            "global_rule": global_rule,
+            "limit": limit,
+            "offset": offset,
+            "cursor": cursor,
+        },
+        tags=["patients:all", "patients"],
+        loader=lambda: PatientService.get_all_patients(
+            user=user,
+            offset=offset,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            global_rule=global_rule,
+            sorting_rules=sorting_rules,
+        ),
+        response_model=schemas.GetAllPatientsOut,
     )
 
 
-@alru_cache
-@patient_router.get("/get_all_by_therapist", response_model=list[schemas.Patient])
+@patient_router.get("/get_all_by_therapist", response_model=Page[schemas.Patient])
 async def get_all_patients_by_therapist(
-    limit: int = 100, offset: int = 0, user: User = Depends(get_current_therapist)
+    limit: int = 100, offset: int = 0, cursor: str | None = None, user: User = Depends(get_current_therapist)
 ):
-    return await PatientService.get_all_patients_by_therapist(
-        user=user, offset=offset, limit=limit, therapist_id=user.id
+    return await response_cache.get_or_set(
+        "therapist_patients",
+        {"therapist_id": user.id, "limit": limit, "offset": offset, "cursor": cursor},
+        tags=["patients:all", f"therapist_patients:{user.id}"],
+        loader=lambda: PatientService.get_all_patients_by_therapist(
+            user=user, offset=offset, limit=limit, cursor=cursor, therapist_id=user.id
+        ),
+        response_model=Page[schemas.Patient],
     )
 
 
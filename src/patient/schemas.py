@@ -2,7 +2,7 @@ import uuid
 from datetime import date
 from enum import Enum
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 
 
 class PatientBase(BaseModel):
@@ -24,6 +24,7 @@ class PatientCreate(PatientBase):
 
 class PatientCreateDB(PatientBase):
     therapist_id: uuid.UUID | str
+    import_key: str | None = None
 
 
 class PatientUpdate(BaseModel):
@@ -39,6 +40,30 @@ class PatientUpdate(BaseModel):
     dep: bool | None = None
 
 
+class PatientRecordImport(BaseModel):
+    visit: str | None = None
+    diagnosis: str | None = None
+    treatment: str | None = None
+
+
+class PatientImport(PatientCreate):
+    import_key: str | None = Field(None, max_length=255)
+    records: list[PatientRecordImport] = []
+
+
+class PatientImportRowResult(BaseModel):
+    row: int
+    id: uuid.UUID | None = None
+    existing: bool = False
+    error: str | None = None
+
+
+class PatientImportOut(BaseModel):
+    imported: int
+    failed: int
+    rows: list[PatientImportRowResult]
+
+
 class Patient(PatientBase):
     id: uuid.UUID
     therapist_id: uuid.UUID
@@ -131,3 +156,4 @@ class PatientStatictic(BaseModel):
 class GetAllPatientsOut(BaseModel):
     patients: list[Patient] | list[ExplorerPatientDTO]
     statistic: PatientStatictic
+    next_cursor: str | None = None
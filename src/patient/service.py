@@ -1,20 +1,36 @@
+import asyncio
 import datetime
+import functools
 import typing
 import uuid
-from operator import not_
 from types import NoneType
+from typing import AsyncIterator
 
 from fastapi import HTTPException
 from loguru import logger
-from sqlalchemy import BinaryExpression, ColumnElement, and_, asc, desc, func, or_, select
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, String, and_, bindparam, func, not_, or_, select, true
 
 from ..auth.models import User
 from ..auth.schemas import UserRole
-from ..database import async_session_maker
+from ..cache import response_cache
+from ..config import settings
+from ..database import async_session_maker, session_scope, transaction_scope
+from ..pagination import KeysetPaginator
+from ..patient_records.dao import PatientRecordsDAO
+from ..patient_records.schemas import PatientRecordsCreateDB
 from ..utils import log_error_with_method_info
 from . import models, schemas
-from .dao import PatientDAO
-from .schemas import ExplorerPatientDTO
+from .classifier import diagnosis_classifier
+from .dao import PatientDAO, PatientStatisticDAO
+
+
+# Row error of a batch that was rolled back; clients retry such rows, unlike validation errors
+IMPORT_BATCH_FAILED_ERROR = "Batch insert failed"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class FilterRules:
@@ -75,59 +91,127 @@ class FilterRules:
         return cls.VALID_RULES
 
 
+class FilterPlan(typing.NamedTuple):
+    """Compiled filters of one query shape: a WHERE clause with named bind parameters and,
+    per filter, the converter turning the raw request value into the bound value."""
+
+    where: ColumnElement
+    converters: tuple[typing.Callable[[str], typing.Any], ...]
+
+    def bind(self, filters: list[schemas.GetFilters]) -> dict[str, typing.Any]:
+        params = {}
+        for index, (convert, f) in enumerate(zip(self.converters, filters)):
+            try:
+                params[FiltersBuilder.param_name(index)] = convert(f.value)
+            except ValueError:
+                raise ValueError(f"Invalid value format for field {f.field}")
+        return params
+
+
 class FiltersBuilder:
 
+    PLAN_CACHE_SIZE = 256
+
+    # Every rule is a pair of (expression builder, value converter). Expressions only ever see a
+    # bind parameter, so one plan serves every request with the same (field, rule) shape.
+    # CONTAINS/ENDS_WITH are served by pg_trgm GIN indexes on the raw columns, EQUALS/STARTS_WITH by
+    # lower(column) text_pattern_ops B-tree indexes (see models.TEXT_SEARCH_COLUMNS)
     STRING_RULES_MAPPING = {
-        schemas.StringFilter.CONTAINS.value: lambda field_attr, value: field_attr.ilike(f"%{value}%"),
-        schemas.StringFilter.STARTS_WITH.value: lambda field_attr, value: field_attr.ilike(f"{value}%"),
-        schemas.StringFilter.ENDS_WITH.value: lambda field_attr, value: field_attr.ilike(f"%{value}"),
-        schemas.StringFilter.EQUALS.value: lambda field_attr, value: field_attr.ilike(value),
-        schemas.StringFilter.NOT_CONTAINS.value: lambda field_attr, value: not_(
-            field_attr.ilike(f"%{value}%")
+        schemas.StringFilter.CONTAINS.value: (
+            lambda field_attr, param: field_attr.ilike(param, escape="\\"),
+            lambda value: f"%{_escape_like(value)}%",
+        ),
+        # A parameterised LIKE cannot use the B-tree index once asyncpg switches to a generic plan,
+        # so the prefix is rendered inline at execution time; the compiled plan is still cached
+        schemas.StringFilter.STARTS_WITH.value: (
+            lambda field_attr, param: func.lower(field_attr).like(
+                bindparam(param.key, type_=String, literal_execute=True), escape="\\"
+            ),
+            lambda value: f"{_escape_like(value.lower())}%",
+        ),
+        schemas.StringFilter.ENDS_WITH.value: (
+            lambda field_attr, param: field_attr.ilike(param, escape="\\"),
+            lambda value: f"%{_escape_like(value)}",
+        ),
+        schemas.StringFilter.EQUALS.value: (
+            lambda field_attr, param: func.lower(field_attr) == param,
+            str.lower,
+        ),
+        schemas.StringFilter.NOT_CONTAINS.value: (
+            lambda field_attr, param: not_(field_attr.ilike(param, escape="\\")),
+            lambda value: f"%{_escape_like(value)}%",
+        ),
+        schemas.StringFilter.NOT_EQUALS.value: (
+            lambda field_attr, param: func.lower(field_attr) != param,
+            str.lower,
         ),
-        schemas.StringFilter.NOT_EQUALS.value: lambda field_attr, value: not_(field_attr.ilike(value)),
     }
 
     BOOLEAN_RULES_MAPPING = {
-        schemas.BooleanFilter.EQUALS.value: lambda field_attr, value: field_attr == (value.lower() == "true"),
-        schemas.BooleanFilter.NOT_EQUALS.value: lambda field_attr, value: field_attr
-        != (value.lower() == "true"),
+        schemas.BooleanFilter.EQUALS.value: (
+            lambda field_attr, param: field_attr == param,
+            lambda value: value.lower() == "true",
+        ),
+        schemas.BooleanFilter.NOT_EQUALS.value: (
+            lambda field_attr, param: field_attr != param,
+            lambda value: value.lower() == "true",
+        ),
     }
 
     INTEGER_RULES_MAPPING = {
-        schemas.IntegerFilter.EQUALS.value: lambda field_attr, value: field_attr == value,
-        schemas.IntegerFilter.LESS_THAN_OR_EQUAL.value: lambda field_attr, value: field_attr <= value,
-        schemas.IntegerFilter.GREATER_THAN_OR_EQUAL.value: lambda field_attr, value: field_attr >= value,
-        schemas.IntegerFilter.LESS_THAN.value: lambda field_attr, value: field_attr < value,
-        schemas.IntegerFilter.GREATER_THAN.value: lambda field_attr, value: field_attr > value,
-        schemas.IntegerFilter.NOT_EQUALS.value: lambda field_attr, value: field_attr != value,
+        schemas.IntegerFilter.EQUALS.value: (lambda field_attr, param: field_attr == param, int),
+        schemas.IntegerFilter.LESS_THAN_OR_EQUAL.value: (lambda field_attr, param: field_attr <= param, int),
+        schemas.IntegerFilter.GREATER_THAN_OR_EQUAL.value: (
+            lambda field_attr, param: field_attr >= param,
+            int,
+        ),
+        schemas.IntegerFilter.LESS_THAN.value: (lambda field_attr, param: field_attr < param, int),
+        schemas.IntegerFilter.GREATER_THAN.value: (lambda field_attr, param: field_attr > param, int),
+        schemas.IntegerFilter.NOT_EQUALS.value: (lambda field_attr, param: field_attr != param, int),
     }
 
-    DATETIME_RULES_MAPPING = INTEGER_RULES_MAPPING
+    DATETIME_RULES_MAPPING = {
+        rule: (build_expression, lambda value: datetime.datetime.strptime(value, "%Y-%m-%d").date())
+        for rule, (build_expression, _) in INTEGER_RULES_MAPPING.items()
+    }
 
     GLOBAL_RULES_MAPPING = {
-        schemas.GlobalRule.EVERY: lambda query_filters: select(models.Patient).filter(
-            *query_filters.values()
-        ),
-        schemas.GlobalRule.SOME: lambda query_filters: select(models.Patient).filter(
-            or_(*query_filters.values())
-        ),
+        schemas.GlobalRule.EVERY: and_,
+        schemas.GlobalRule.SOME: or_,
     }
 
     @classmethod
     async def apply_filters(
         cls, filters: list[schemas.GetFilters], global_rule: str
-    ) -> list[BinaryExpression]:
-        query_filters = await cls.build_query_filters(filters)
-        if global_rule == schemas.GlobalRule.SOME:
-            return or_(*query_filters.values())
-        if global_rule == schemas.GlobalRule.EVERY:
-            return and_(*query_filters.values())
+    ) -> tuple[ColumnElement, dict[str, typing.Any]]:
+        """Returns the WHERE clause for the filters and the parameters to execute it with."""
+        shape = tuple((f.field.lower(), f.rule.lower()) for f in filters)
+        plan = cls.compile_plan(shape, global_rule)
+        return plan.where, plan.bind(filters)
+
+    @classmethod
+    @functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+    def compile_plan(cls, shape: tuple[tuple[str, str], ...], global_rule: str) -> FilterPlan:
+        combine = cls.GLOBAL_RULES_MAPPING.get(global_rule)
+        if combine is None:
+            raise HTTPException(status_code=400, detail=("Please, use 'some' or 'every' global rules!"))
+
+        expressions = []
+        converters = []
+        for index, (field, rule) in enumerate(shape):
+            build_expression, convert = cls.build_rule(field, rule)
+            field_attr: ColumnElement = getattr(models.Patient, field)
+            expressions.append(build_expression(field_attr, bindparam(cls.param_name(index))))
+            converters.append(convert)
 
-        raise HTTPException(status_code=400, detail=("Please, use 'some' or 'every' global rules!"))
+        return FilterPlan(where=combine(*expressions), converters=tuple(converters))
 
     @staticmethod
-    async def remove_optional(field_type: type) -> type:
+    def param_name(index: int) -> str:
+        return f"filter_{index}"
+
+    @staticmethod
+    def remove_optional(field_type: type) -> type:
         args = typing.get_args(field_type)
         for arg in args:
             if arg is not NoneType:
@@ -136,38 +220,18 @@ class FiltersBuilder:
         return field_type
 
     @classmethod
-    async def build_query_filters(cls, filters: list[schemas.GetFilters]) -> dict[str, BinaryExpression]:
-        query_filters: dict[str, BinaryExpression] = {}
-        VALID_FIELDS: list[str] = FilterRules.get_valid_fields()
-        VALID_RULES: dict[str, list[str]] = FilterRules.get_valid_rules()
-        for f in filters:
-            field = f.field.lower()
-            rule = f.rule.lower()
+    def build_rule(cls, field: str, rule: str) -> tuple[typing.Callable, typing.Callable]:
+        if field not in FilterRules.get_valid_fields():
+            raise ValueError(f"Invalid field: {field}")
 
-            if field not in VALID_FIELDS:
-                raise ValueError(f"Invalid field: {field}")
+        if rule not in FilterRules.get_valid_rules_for_field(field):
+            raise ValueError(f"Invalid rule for {field} field.")
 
-            if rule not in VALID_RULES.get(field, []):
-                raise ValueError(f"Invalid rule for {field} field.")
-
-            field_type = schemas.PatientBase.__annotations__[field]
-            field_type = await cls.remove_optional(field_type)
-            value = f.value
-
-            if field_type == datetime.date:
-                try:
-                    value = datetime.datetime.strptime(value, "%Y-%m-%d").date()
-                except ValueError:
-                    raise ValueError(f"Invalid value format for field {field}")
-
-            field_attr: ColumnElement = getattr(models.Patient, field)
-            rule_func = cls.get_rule_function(field_type, rule)
-            query_filters[field] = rule_func(field_attr, value)
-
-        return query_filters
+        field_type = cls.remove_optional(schemas.PatientBase.__annotations__[field])
+        return cls.get_rule_function(field_type, rule)
 
     @classmethod
-    def get_rule_function(cls, field_type: type, rule: str) -> dict:
+    def get_rule_function(cls, field_type: type, rule: str) -> tuple[typing.Callable, typing.Callable]:
         rule_mappings = {
             str: cls.STRING_RULES_MAPPING,
             bool: cls.BOOLEAN_RULES_MAPPING,
@@ -193,12 +257,144 @@ class PatientService:
                 )
             )
 
+            await cls.__update_statistic(db_patient.therapist_id, after=db_patient)
+            await cls.__invalidate_cache(db_patient)
+
             logger.info(f"Пациент: {db_patient}")
             return db_patient
 
         except Exception as e:
             log_error_with_method_info(e)
 
+    @classmethod
+    async def import_patients(cls, chunks: AsyncIterator[bytes], user: User) -> dict:
+        try:
+            logger.info(f"Терапевт {user.username} импортирует пациентов")
+            results = []
+            batch = []
+            async for row_number, line in cls.__iter_ndjson(chunks):
+                try:
+                    batch.append((row_number, schemas.PatientImport.model_validate_json(line)))
+                except ValidationError as e:
+                    results.append(
+                        {
+                            "row": row_number,
+                            "id": None,
+                            "existing": False,
+                            "error": cls.__format_validation_error(e),
+                        }
+                    )
+                    continue
+
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    results += await cls.__import_batch(batch, user)
+                    batch = []
+
+            if batch:
+                results += await cls.__import_batch(batch, user)
+
+            results.sort(key=lambda result: result["row"])
+            imported = sum(result["error"] is None for result in results)
+            logger.info(f"Терапевт {user.username} импортировал {imported} из {len(results)} пациентов")
+            return {"imported": imported, "failed": len(results) - imported, "rows": results}
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @classmethod
+    async def __import_batch(cls, batch: list[tuple[int, schemas.PatientImport]], user: User) -> list[dict]:
+        """Inserts the patients of a batch and their records in one transaction.
+
+        Rows whose import_key the therapist has already imported, in an earlier request or
+        earlier in the batch, are not inserted again and are reported with the existing id.
+        """
+        try:
+            async with transaction_scope():
+                imported = await PatientDAO.find_ids_by_import_keys(
+                    user.id, [patient.import_key for _, patient in batch if patient.import_key]
+                )
+                new_rows, repeated_rows, new_keys = [], [], set()
+                for row_number, patient in batch:
+                    if patient.import_key and (
+                        patient.import_key in imported or patient.import_key in new_keys
+                    ):
+                        repeated_rows.append((row_number, patient))
+                    else:
+                        new_rows.append((row_number, patient))
+                        new_keys.add(patient.import_key)
+
+                classified = diagnosis_classifier.classify_many(
+                    diagnosis_classifier.SEPARATOR.join(
+                        record.diagnosis for record in patient.records if record.diagnosis is not None
+                    )
+                    for _, patient in new_rows
+                )
+                patients = [
+                    schemas.PatientCreateDB(
+                        **{**patient.model_dump(exclude={"records"}), **(flags if patient.records else {})},
+                        therapist_id=user.id,
+                    )
+                    for (_, patient), flags in zip(new_rows, classified)
+                ]
+                patient_ids = await PatientDAO.add_many(patients, return_ids=True)
+                await PatientRecordsDAO.add_many(
+                    [
+                        PatientRecordsCreateDB(**record.model_dump(), patient_id=patient_id)
+                        for (_, patient), patient_id in zip(new_rows, patient_ids)
+                        for record in patient.records
+                    ]
+                )
+
+                counters = [cls.__get_patient_counters(patient) for patient in patients]
+                await PatientStatisticDAO.add_delta(
+                    user.id, {name: sum(c[name] for c in counters) for name in PatientStatisticDAO.COUNTERS}
+                )
+                if patients:
+                    await response_cache.invalidate("patients", f"therapist_patients:{user.id}")
+
+        except Exception as e:
+            logger.opt(exception=e).error(f"Не удалось импортировать строки {batch[0][0]}-{batch[-1][0]}")
+            return [
+                {"row": row_number, "id": None, "existing": False, "error": IMPORT_BATCH_FAILED_ERROR}
+                for row_number, _ in batch
+            ]
+
+        imported.update(
+            (patient.import_key, patient_id)
+            for (_, patient), patient_id in zip(new_rows, patient_ids)
+            if patient.import_key
+        )
+        return [
+            {"row": row_number, "id": patient_id, "existing": False, "error": None}
+            for (row_number, _), patient_id in zip(new_rows, patient_ids)
+        ] + [
+            {"row": row_number, "id": imported[patient.import_key], "existing": True, "error": None}
+            for row_number, patient in repeated_rows
+        ]
+
+    @staticmethod
+    async def __iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+        """Splits a byte stream into non-empty lines, numbered from 1."""
+        buffer = b""
+        row_number = 0
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    row_number += 1
+                    yield row_number, line
+
+        if buffer.strip():
+            yield row_number + 1, buffer
+
+    @staticmethod
+    def __format_validation_error(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"]
+            for err in error.errors()
+        )
+
     @classmethod
     async def get_patient(cls, patient_id: uuid.UUID, user: User) -> models.Patient:
         try:
@@ -213,13 +409,15 @@ class PatientService:
 
     @classmethod
     async def get_all_patients_by_therapist(
-        cls, *filter, user: User, offset: int, limit: int, **filter_by
-    ) -> list[models.Patient]:
+        cls, *filter, user: User, offset: int, limit: int, cursor: str | None = None, **filter_by
+    ) -> dict:
         try:
             logger.info(f"Терапевт {user.username} получает список всех своих пациентов")
-            patients = await PatientDAO.find_all(*filter, offset=offset, limit=limit, **filter_by)
+            patients, next_cursor = await PatientDAO.find_page(
+                *filter, cursor=cursor, offset=offset, limit=limit, **filter_by
+            )
 
-            return patients or []
+            return {"items": patients, "next_cursor": next_cursor}
 
         except Exception as e:
             log_error_with_method_info(e)
@@ -233,121 +431,83 @@ class PatientService:
         global_rule: str,
         filters: list[schemas.GetFilters] = [],
         sorting_rules: list[schemas.GetSorting] = [],
-    ) -> list[models.Patient] | list[ExplorerPatientDTO]:
-        try:
-            async with async_session_maker() as session:
-                query = (
-                    select(
-                        models.Patient,
-                        func.count()
-                        .filter(func.lower(models.Patient.inhabited_locality).contains("город"))
-                        .label("city_count"),
-                        func.count()
-                        .filter(func.lower(models.Patient.inhabited_locality).contains("село"))
-                        .label("district_count"),
-                        func.count().filter(func.lower(models.Patient.gender) == "м").label("male_count"),
-                        func.count().filter(func.lower(models.Patient.gender) == "ж").label("female_count"),
-                        func.count().filter(models.Patient.bp == True).label("bp_count"),
-                        func.count().filter(models.Patient.ischemia == True).label("ischemia_count"),
-                        func.count().filter(models.Patient.dep == True).label("dep_count"),
-                    )
-                    .group_by(
-                        models.Patient,
-                        models.Patient.gender,
-                        models.Patient.birthday,
-                        models.Patient.full_name,
-                        models.Patient.living_place,
-                        models.Patient.job_title,
-                        models.Patient.therapist_id,
-                        models.Patient.id,
-                    )
-                    .offset(offset)
-                    .limit(limit)
-                )
-
-                if filters:
-                    query_filters = await FiltersBuilder.apply_filters(filters, global_rule)
-                    query = query.where(query_filters)
-
-                if sorting_rules:
-                    for rule in sorting_rules:
-                        if rule.order == schemas.Order.ASC:
-                            query = query.order_by(asc(getattr(models.Patient, rule.field)))
-                        elif rule.order == schemas.Order.DESC:
-                            query = query.order_by(desc(getattr(models.Patient, rule.field)))
-
-                result = await session.execute(query)
-                patients_with_stats = result.all()
-
-                statistics = {
-                    "bp": sum(row.bp_count for row in patients_with_stats),
-                    "dep": sum(row.dep_count for row in patients_with_stats),
-                    "ischemia": sum(row.ischemia_count for row in patients_with_stats),
-                    "city": sum(row.city_count for row in patients_with_stats),
-                    "district": sum(row.district_count for row in patients_with_stats),
-                    "male": sum(row.male_count for row in patients_with_stats),
-                    "female": sum(row.female_count for row in patients_with_stats),
-                }
-                formatted_patients = await cls.__format_patient_data(
-                    user=user, patient_records=[row.Patient for row in patients_with_stats]
-                )
-
-                return {"patients": formatted_patients, "statistic": statistics}
-        except Exception as e:
-            log_error_with_method_info(e)
-
-    @classmethod
-    async def __format_patient_data(cls, user: User, patient_records: list[models.Patient]) -> list:
-        try:
-            if user.role == UserRole.therapist.value:
-                return patient_records
-            elif user.role == UserRole.explorer.value:
-                logger.info(f"Форматирование данных для пользователя {user.username} с ролью {user.role}")
-                return await cls.__format_patient_data_for_explorer(patient_records)
-
-            else:
-                logger.opt().critical(f"Неожиданная роль пользователя {user.username}: {user.role}")
-                raise ValueError
-
-        except Exception as e:
-            log_error_with_method_info(e)
-
-    @classmethod
-    async def __format_patient_data_for_explorer(cls, patient_records: list[models.Patient]) -> list:
+        cursor: str | None = None,
+    ) -> dict:
         try:
-            formatted_patient_records = []
-
-            for patient_record in patient_records:
-                patient_record = schemas.Patient(**patient_record.__dict__)
-                formatted_record = await cls.__get_data_into_explorer_dto_scheme(
-                    patient_record=patient_record
-                )
-
-                if len(patient_records) == 1:
-                    res = []
-                    res.append(formatted_record)
-                    return res
-
-                formatted_patient_records.append(formatted_record)
+            where, params = (
+                await FiltersBuilder.apply_filters(filters, global_rule) if filters else (None, {})
+            )
+            dto = cls.__get_patient_dto(user)
+            for rule in sorting_rules or []:
+                if rule.field not in dto.model_fields:
+                    raise HTTPException(status_code=400, detail=f"Sorting by '{rule.field}' is not available")
+            paginator = KeysetPaginator(
+                models.Patient,
+                [(rule.field, rule.order == schemas.Order.DESC) for rule in sorting_rules or []],
+            )
 
-            logger.info("Возвращение отформатированных данных для пользователя с ролью исследователя")
-            return formatted_patient_records
+            (patients, next_cursor), statistics = await asyncio.gather(
+                cls.__get_patients_page(
+                    where, params, paginator, dto=dto, cursor=cursor, offset=offset, limit=limit
+                ),
+                cls.__get_patient_statistic(where, params),
+            )
 
+            return {"patients": patients, "statistic": statistics, "next_cursor": next_cursor}
         except Exception as e:
             log_error_with_method_info(e)
 
     @staticmethod
-    async def __get_data_into_explorer_dto_scheme(
-        patient_record: schemas.Patient,
-    ) -> schemas.ExplorerPatientDTO:
-        try:
+    def __get_patient_dto(user: User) -> type[schemas.Patient] | type[schemas.ExplorerPatientDTO]:
+        if user.role == UserRole.therapist.value:
+            return schemas.Patient
+        if user.role == UserRole.explorer.value:
+            logger.info(f"Форматирование данных для пользователя {user.username} с ролью {user.role}")
+            return schemas.ExplorerPatientDTO
 
-            patient_record = patient_record.model_dump()
+        logger.opt().critical(f"Неожиданная роль пользователя {user.username}: {user.role}")
+        raise ValueError
 
-            return schemas.ExplorerPatientDTO(**patient_record)
+    @staticmethod
+    async def __get_patients_page(
+        where: ColumnElement | None,
+        params: dict,
+        paginator: KeysetPaginator,
+        dto: type[schemas.Patient] | type[schemas.ExplorerPatientDTO],
+        cursor: str | None,
+        offset: int,
+        limit: int,
+    ) -> tuple[list[schemas.Patient] | list[schemas.ExplorerPatientDTO], str | None]:
+        # Only the DTO columns (plus id for the cursor) are selected, so fields hidden from
+        # explorers never leave the database and rows map straight onto the DTO
+        columns = [
+            models.Patient.id,
+            *(getattr(models.Patient, field) for field in dto.model_fields if field != "id"),
+        ]
+        async with session_scope() as session:
+            query = paginator.apply(
+                select(*columns).where(where if where is not None else true()),
+                cursor=cursor,
+                offset=offset,
+                limit=limit,
+            )
+            result = await session.execute(query, params)
+            rows, next_cursor = paginator.page(result.all(), limit)
+            return [dto(**row._mapping) for row in rows], next_cursor
 
-        except Exception as e:
-            log_error_with_method_info(e)
+    @staticmethod
+    async def __get_patient_statistic(where: ColumnElement | None, params: dict) -> dict[str, int]:
+        # Unfiltered requests read the maintained counters instead of scanning patients
+        if where is None:
+            query = select(*PatientStatisticDAO.total_columns())
+        else:
+            query = select(*PatientStatisticDAO.count_columns()).where(where)
+
+        # Runs on its own session so it can overlap with the page query of the request session:
+        # an AsyncSession must never be used by two tasks at once
+        async with async_session_maker() as session:
+            result = await session.execute(query, params)
+            return {name: int(value) for name, value in result.one()._mapping.items()}
 
     @classmethod
     async def update_patient(
@@ -355,9 +515,15 @@ class PatientService:
     ) -> models.Patient:
         try:
             logger.info(f"Терапевт {user.username} изменяет данные пациента {patient_id}")
+            old_patient = await PatientDAO.find_one_or_none(
+                models.Patient.id == patient_id, models.Patient.therapist_id == user.id
+            )
+            old_patient = cls.snapshot(old_patient)
             patient = await PatientDAO.update(
                 models.Patient.id == patient_id, models.Patient.therapist_id == user.id, obj_in=patient_in
             )
+            await cls.__update_statistic(patient.therapist_id, before=old_patient, after=patient)
+            await cls.__invalidate_cache(patient)
             logger.info(f"Обновленные данные пациента: {patient}")
 
             return patient
@@ -369,7 +535,11 @@ class PatientService:
     async def delete_patient(cls, patient_id: uuid.UUID, user: User) -> dict:
         try:
             logger.info(f"Терапевт {user.username} удаляет пациента {patient_id}")
+            patient = await PatientDAO.find_one_or_none(models.Patient.id == patient_id)
             await PatientDAO.delete(models.Patient.id == patient_id)
+            if patient:
+                await cls.__update_statistic(patient.therapist_id, before=patient)
+                await cls.__invalidate_cache(patient)
 
             return {"message": f"Терапевт {user.username} успешно удалил пациента {patient_id}"}
 
@@ -379,4 +549,143 @@ class PatientService:
     @classmethod
     async def delete_all_patients(cls, superuser: User) -> dict:
         await PatientDAO.delete()
+        await PatientStatisticDAO.delete()
+        await response_cache.invalidate("patients", "patients:all", "patient_records:all")
         return {"message": "успех"}
+
+    @classmethod
+    async def reclassify_patient(cls, patient_id: uuid.UUID) -> None:
+        """Re-derives the cohort flags of a patient from all of its record diagnoses.
+
+        Patients without records keep the flags they were given.
+        """
+        try:
+            patient = await PatientDAO.find_one_or_none(models.Patient.id == patient_id)
+            diagnoses = await PatientRecordsDAO.find_diagnoses(patient_id)
+            if patient is None or not diagnoses:
+                return
+
+            flags = diagnosis_classifier.classify(
+                diagnosis_classifier.SEPARATOR.join(d for d in diagnoses if d is not None)
+            )
+            changed = {flag: value for flag, value in flags.items() if getattr(patient, flag) != value}
+            if not changed:
+                return
+
+            logger.info(f"Флаги пациента {patient_id} изменены по диагнозам: {changed}")
+            old_patient = cls.snapshot(patient)
+            patient = await PatientDAO.update(models.Patient.id == patient_id, obj_in=changed)
+            await cls.__update_statistic(patient.therapist_id, before=old_patient, after=patient)
+            await cls.__invalidate_cache(patient)
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @classmethod
+    async def reclassify_all(cls, batch_size: int = settings.RECLASSIFY_BATCH_SIZE) -> int:
+        """Reclassifies every patient with records, committing one batch of patients at a time."""
+        try:
+            logger.info("Переклассификация пациентов по диагнозам")
+            flags = diagnosis_classifier.flags
+            changed_count = 0
+            after_id = None
+            while True:
+                async with transaction_scope():
+                    rows = await PatientDAO.find_diagnoses_page(flags, after_id=after_id, limit=batch_size)
+                    classified = diagnosis_classifier.classify_many(row.diagnoses for row in rows)
+                    changes = [
+                        {"id": row.id, **result}
+                        for row, result in zip(rows, classified)
+                        if any(getattr(row, flag) != result[flag] for flag in flags)
+                    ]
+                    if changes:
+                        await PatientDAO.update_many(changes)
+
+                changed_count += len(changes)
+                if len(rows) < batch_size:
+                    break
+                after_id = rows[-1].id
+
+            if changed_count:
+                await PatientStatisticDAO.rebuild()
+                await response_cache.invalidate("patients:all", "patient_records:all")
+            logger.info(f"Переклассифицировано пациентов: {changed_count}")
+            return changed_count
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @classmethod
+    async def sync_statistic(
+        cls,
+        before: schemas.PatientCreateDB | None = None,
+        after: schemas.PatientCreateDB | None = None,
+    ) -> None:
+        """Applies a change made outside of this service (the admin panel) to the statistics.
+
+        Both sides are snapshots of the patient; the therapist may differ between them.
+        """
+        try:
+            async with transaction_scope():
+                if before is not None and (after is None or before.therapist_id != after.therapist_id):
+                    await cls.__update_statistic(before.therapist_id, before=before)
+                    before = None
+                if after is not None:
+                    await cls.__update_statistic(after.therapist_id, before=before, after=after)
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @classmethod
+    async def rebuild_statistic(cls) -> None:
+        try:
+            logger.info("Пересчет статистики пациентов")
+            await PatientStatisticDAO.rebuild()
+
+        except Exception as e:
+            log_error_with_method_info(e)
+
+    @staticmethod
+    async def __invalidate_cache(patient: models.Patient) -> None:
+        await response_cache.invalidate(
+            "patients",
+            f"patient:{patient.id}",
+            f"patient_records:{patient.id}",
+            f"therapist_patients:{patient.therapist_id}",
+        )
+
+    @staticmethod
+    def snapshot(patient: models.Patient | None) -> schemas.PatientCreateDB | None:
+        """Copies the counted fields, since an UPDATE refreshes the loaded ORM object in place."""
+        return schemas.PatientCreateDB.model_validate(patient, from_attributes=True) if patient else None
+
+    @classmethod
+    async def __update_statistic(
+        cls,
+        therapist_id: uuid.UUID,
+        before: models.Patient | None = None,
+        after: models.Patient | None = None,
+    ) -> None:
+        before_counters = cls.__get_patient_counters(before)
+        after_counters = cls.__get_patient_counters(after)
+        await PatientStatisticDAO.add_delta(
+            therapist_id, {name: after_counters[name] - before_counters[name] for name in after_counters}
+        )
+
+    @staticmethod
+    def __get_patient_counters(patient: models.Patient | schemas.PatientBase | None) -> dict[str, int]:
+        """Python counterpart of PatientStatisticDAO.count_columns for a single patient."""
+        if patient is None:
+            return dict.fromkeys(PatientStatisticDAO.COUNTERS, 0)
+
+        inhabited_locality = (patient.inhabited_locality or "").lower()
+        gender = (patient.gender or "").lower()
+        return {
+            "bp": int(patient.bp),
+            "dep": int(patient.dep),
+            "ischemia": int(patient.ischemia),
+            "city": int("город" in inhabited_locality),
+            "district": int("село" in inhabited_locality),
+            "male": int(gender == "м"),
+            "female": int(gender == "ж"),
+        }
@@ -1,7 +1,53 @@
+import uuid
+from typing import Any, Sequence
+
+from sqlalchemy import select
+
 from ..dao import BaseDAO
+from ..database import session_scope
+from ..pagination import KeysetPaginator
+from ..patient.models import Patient
 from .models import PatientRecord
 from .schemas import PatientRecordsCreate, PatientRecordsUpdate
 
 
 class PatientRecordsDAO(BaseDAO[PatientRecord, PatientRecordsCreate, PatientRecordsUpdate]):
     model = PatientRecord
+
+    @classmethod
+    async def find_diagnoses(cls, patient_id: uuid.UUID) -> list[str | None]:
+        async with session_scope() as db:
+            result = await db.execute(
+                select(PatientRecord.diagnosis).where(PatientRecord.patient_id == patient_id)
+            )
+            return list(result.scalars().all())
+
+    @classmethod
+    async def find_page_with_patient(
+        cls,
+        *filter,
+        columns: Sequence[Any] | None = None,
+        cursor: str | None = None,
+        offset: int | None = None,
+        limit: int = 100,
+        isouter: bool = False,
+    ) -> tuple[list[Any], str | None]:
+        """Pages records joined with their patient in one query.
+
+        Filters may reference Patient columns. Without ``columns`` PatientRecord objects are
+        returned, otherwise rows with the record id followed by the requested columns. With
+        ``isouter`` records without a patient are kept.
+        """
+        async with session_scope() as db:
+
+            paginator = KeysetPaginator(cls.model)
+            entities = [cls.model] if columns is None else [cls.model.id, *columns]
+            stmt = (
+                select(*entities)
+                .join(Patient, cls.model.patient_id == Patient.id, isouter=isouter)
+                .filter(*filter)
+            )
+            stmt = paginator.apply(stmt, cursor=cursor, offset=offset, limit=limit)
+            result = await db.execute(stmt)
+            rows = result.scalars().all() if columns is None else result.all()
+            return paginator.page(rows, limit)
@@ -18,7 +18,7 @@ class PatientRecord(Base, BaseIDMixin):
     treatment: Mapped[str_null]
 
     patient_id: Mapped[uuid.UUID] = mapped_column(
-        UUID, ForeignKey("patients.id", ondelete="CASCADE"), nullable=True
+        UUID, ForeignKey("patients.id", ondelete="CASCADE"), nullable=True, index=True
     )
     therapist_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id"), nullable=True)
 
@@ -1,8 +1,11 @@
-from async_lru import alru_cache
+import uuid
+
 from fastapi import APIRouter, Depends
 
 from ..auth.dependencies import get_current_superuser, get_current_user
 from ..auth.models import User
+from ..cache import response_cache
+from ..pagination import Page
 from . import schemas
 from .dependencies import get_current_therapist
 from .service import PatientRecordsService
@@ -29,15 +32,24 @@ async def create_patient_record(
 #     )
 
 
-@alru_cache
 @patient_records_router.get(
-    "/get_all_by_patient", response_model=list[schemas.PatientRecords] | list[schemas.ExplorerPatientDTO]
+    "/get_all_by_patient", response_model=Page[schemas.PatientRecords] | Page[schemas.ExplorerPatientDTO]
 )
 async def get_patient_records(
-    patient_id: str, limit: int = 100, offset: int = 0, user: User = Depends(get_current_user)
+    patient_id: uuid.UUID,
+    limit: int = 100,
+    offset: int = 0,
+    cursor: str | None = None,
+    user: User = Depends(get_current_user),
 ):
-    return await PatientRecordsService.get_patient_records(
-        patient_id=patient_id, user=user, limit=limit, offset=offset
+    return await response_cache.get_or_set(
+        "patient_records",
+        {"role": user.role, "patient_id": patient_id, "limit": limit, "offset": offset, "cursor": cursor},
+        tags=["patient_records:all", f"patient_records:{patient_id}"],
+        loader=lambda: PatientRecordsService.get_patient_records(
+            patient_id=patient_id, user=user, limit=limit, offset=offset, cursor=cursor
+        ),
+        response_model=Page[schemas.PatientRecords] | Page[schemas.ExplorerPatientDTO],
     )
 
 
@@ -53,16 +65,13 @@ async def get_patient_records(
 #     return await PatientRecordsService.get_all_patient_records(limit=limit, offset=offset, user=user)
 
 
-# @patient_records_router.get(  # noqa
-#     "/get_all_by_therapist",
-#     response_model=Union[list[schemas.PatientRecords], list[schemas.ExplorerPatientDTO]],
-# )
-# async def get_all_patient_records_by_therapist(
-#     limit: int = 100, offset: int = 0, user: User = Depends(get_current_user)
-# ):
-#     return await PatientRecordsService.get_all_patient_records_by_therapist(
-#         user=user, offset=offset, limit=limit, therapist_id=user.id
-#     )
+@patient_records_router.get("/get_all_by_therapist", response_model=Page[schemas.PatientRecords])
+async def get_all_patient_records_by_therapist(
+    limit: int = 100, offset: int = 0, cursor: str | None = None, user: User = Depends(get_current_therapist)
+):
+    return await PatientRecordsService.get_all_patient_records_by_therapist(
+        user=user, offset=offset, limit=limit, cursor=cursor, therapist_id=user.id
+    )
 
 
 @patient_records_router.patch("/update_patient_record", response_model=schemas.PatientRecords)
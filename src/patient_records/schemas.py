@@ -1,4 +1,5 @@
 import uuid
+from datetime import date
 
 from pydantic import BaseModel
 
@@ -35,7 +36,7 @@ class PatientRecordsUpdate(BaseModel):
 
 
 class ExplorerPatientDTO(BaseModel):
-    birthday: str
+    birthday: date | None
     gender: str
     inhabited_locality: str | None = None
     diagnosis: str | None = None
@@ -1,17 +1,30 @@
 import uuid
 
 from loguru import logger
-from sqlalchemy import and_
 
 from ..auth.models import User
 from ..auth.schemas import UserRole
-from ..patient.dao import PatientDAO
+from ..cache import response_cache
 from ..patient.models import Patient
+from ..patient.service import PatientService
 from ..utils import log_error_with_method_info
 from . import models, schemas
 from .dao import PatientRecordsDAO
 
 
+# Record and patient columns an explorer gets, selected with a single join
+EXPLORER_COLUMNS = (
+    models.PatientRecord.diagnosis,
+    models.PatientRecord.treatment,
+    Patient.birthday,
+    Patient.gender,
+    Patient.inhabited_locality,
+    Patient.bp,
+    Patient.ischemia,
+    Patient.dep,
+)
+
+
 class PatientRecordsService:
 
     @classmethod
@@ -23,6 +36,8 @@ class PatientRecordsService:
                 f"Терапевт {user.username} создает запись о пациенте {patient_record_data.patient_id}"
             )
             db_patient_record = await cls.__create_patient_record_db(patient_record_data)
+            await PatientService.reclassify_patient(db_patient_record.patient_id)
+            await response_cache.invalidate(f"patient_records:{db_patient_record.patient_id}")
             logger.info(f"Запись о пациенте: {db_patient_record}")
             return db_patient_record
 
@@ -41,46 +56,46 @@ class PatientRecordsService:
 
     @classmethod
     async def get_patient_records(
-        cls, user: User, patient_id: uuid.UUID, offset: int, limit: int, **filter_by
-    ) -> list[models.PatientRecord]:
+        cls,
+        user: User,
+        patient_id: uuid.UUID,
+        offset: int,
+        limit: int,
+        cursor: str | None = None,
+    ) -> dict:
         try:
             logger.info(
                 f"Пользователь {user.username} с ролью {user.role} получает данные о записях пациента {patient_id}"
             )
-            patient_records = await PatientRecordsDAO.find_all(
-                models.PatientRecord.patient_id == patient_id, offset=offset, limit=limit, **filter_by
+            patient_records, next_cursor = await cls.__get_records_page(
+                user,
+                models.PatientRecord.patient_id == patient_id,
+                cursor=cursor,
+                offset=offset,
+                limit=limit,
             )
 
-            return await cls.__format_patient_data(user=user, patient_records=patient_records)
+            return {"items": patient_records, "next_cursor": next_cursor}
 
         except Exception as e:
             log_error_with_method_info(e)
 
     @classmethod
     async def get_one_patient_record(
-        cls, user: User, patient_id: uuid.UUID, patient_record_id: uuid.UUID, **filter_by
-    ) -> models.PatientRecord | None:
+        cls, user: User, patient_id: uuid.UUID, patient_record_id: uuid.UUID
+    ) -> list[models.PatientRecord] | list[schemas.ExplorerPatientDTO] | dict:
         try:
             logger.info(
                 f"Пользователь {user.username} с ролью {user.role} получает данные о записи пациента {patient_record_id}"
             )
-            patient_record = (
-                await PatientRecordsDAO.find_one_or_none(
-                    and_(
-                        models.PatientRecord.patient_id == patient_id,
-                        models.PatientRecord.id == patient_record_id,
-                    ),
-                    **filter_by,
-                ),
+            patient_records, _ = await cls.__get_records_page(
+                user,
+                models.PatientRecord.patient_id == patient_id,
+                models.PatientRecord.id == patient_record_id,
+                limit=1,
             )
-            if patient_record[
-                0
-            ]:  # BaseDAO.find_one_or_none возвращает кортеж, поэтому нужно достать значение # noqa
-                list_patient_record = []
-                list_patient_record.append(
-                    patient_record[0]
-                )  # __format_patient_data трубует список с типом list[PatientRecord] # noqa
-                return await cls.__format_patient_data(user=user, patient_records=list_patient_record)
+            if patient_records:
+                return patient_records
             return {"Message": "Запись не найдена"}
 
         except Exception as e:
@@ -88,43 +103,30 @@ class PatientRecordsService:
 
     @classmethod
     async def get_all_patient_records(
-        cls, *filter, user: User, offset: int, limit: int, **filter_by
-    ) -> list[models.PatientRecord]:
+        cls, *filter, user: User, offset: int, limit: int, cursor: str | None = None
+    ) -> dict:
         try:
             logger.info(f"Пользователь {user.username} с ролью {user.role} получает все записи пациентов")
-            patient_records = await PatientRecordsDAO.find_all(
-                *filter, offset=offset, limit=limit, **filter_by
-            )
-            formatted_patient_data = await cls.__format_patient_data(
-                user=user, patient_records=patient_records
+            patient_records, next_cursor = await cls.__get_records_page(
+                user, *filter, cursor=cursor, offset=offset, limit=limit
             )
 
-            return formatted_patient_data
+            return {"items": patient_records, "next_cursor": next_cursor}
 
         except Exception as e:
             log_error_with_method_info(e)
 
     @classmethod
     async def get_all_patient_records_by_therapist(
-        cls, *filter, user: User, offset: int, limit: int, **filter_by
-    ) -> list[models.PatientRecord]:
+        cls, user: User, therapist_id: uuid.UUID, offset: int, limit: int, cursor: str | None = None
+    ) -> dict:
         try:
-            logger.info(f"Терапевт {user.username} получает список всех своих пациентов")
-            patients = await PatientDAO.find_all(*filter, **filter_by)
-
-            patient_records = []
-
-            patient_ids = [patient.id for patient in patients]
-
-            patient_records = await PatientRecordsDAO.find_all()
-            for patient_record in patient_records:
-                if patient_record.patient_id in patient_ids:
-
-                    if len(patient_records) >= limit:
-                        return patient_records
+            logger.info(f"Терапевт {user.username} получает записи всех своих пациентов")
+            patient_records, next_cursor = await cls.__get_records_page(
+                user, Patient.therapist_id == therapist_id, cursor=cursor, offset=offset, limit=limit
+            )
 
-                    patient_records.append(patient_record)
-            return patient_records
+            return {"items": patient_records, "next_cursor": next_cursor}
 
         except Exception as e:
             log_error_with_method_info(e)
@@ -138,6 +140,9 @@ class PatientRecordsService:
             patient_record = await PatientRecordsDAO.update(
                 models.PatientRecord.id == patient_record_id, obj_in=patient_in
             )
+            if "diagnosis" in patient_in.model_fields_set:
+                await PatientService.reclassify_patient(patient_record.patient_id)
+            await response_cache.invalidate(f"patient_records:{patient_record.patient_id}")
             logger.info(f"Обновленная запись пациента: {patient_record}")
 
             return patient_record
@@ -150,7 +155,13 @@ class PatientRecordsService:
         try:
             logger.info(f"Терапевт {user.username} удаляет запись пациента {patient_record_id}")
 
+            patient_record = await PatientRecordsDAO.find_one_or_none(
+                models.PatientRecord.id == patient_record_id
+            )
             await PatientRecordsDAO.delete(models.PatientRecord.id == patient_record_id)
+            if patient_record:
+                await PatientService.reclassify_patient(patient_record.patient_id)
+                await response_cache.invalidate(f"patient_records:{patient_record.patient_id}")
             status_message = f"Терапевт {user.username} успешно удалил запись пациента {patient_record_id}"
             logger.info(status_message)
 
@@ -162,66 +173,25 @@ class PatientRecordsService:
     @classmethod
     async def delete_all_patient_records(cls, superuser: User) -> dict:
         await PatientRecordsDAO.delete()
+        await response_cache.invalidate("patient_records:all")
         return {"message": "успех"}
 
-    @classmethod
-    async def __format_patient_data(cls, user: User, patient_records: list[models.PatientRecord]) -> list:
-        try:
-            if user.role == UserRole.therapist.value:
-                return patient_records
-            elif user.role == UserRole.explorer.value:
-                logger.info(f"Форматирование данных для пользователя {user.username} с ролью {user.role}")
-                return await cls.__format_patient_data_for_explorer(patient_records)
-
-            else:
-                logger.opt().critical(f"Неожиданная роль пользователя {user.username}: {user.role}")
-                raise ValueError
-
-        except Exception as e:
-            log_error_with_method_info(e)
-
-    @classmethod
-    async def __format_patient_data_for_explorer(cls, patient_records: list[models.PatientRecord]) -> list:
-        try:
-            formatted_patient_records = []
-
-            for patient_record in patient_records:
-                patient_record = schemas.PatientRecords(**patient_record.__dict__)
-                formatted_record = await cls.__get_data_into_explorer_dto_scheme(
-                    patient_record=patient_record
-                )
-
-                if len(patient_records) == 1:
-                    return formatted_record
-
-                formatted_patient_records.append(formatted_record)
-
-            logger.info("Возвращение отформатированных данных для пользователя с ролью исследователь")
-            return formatted_patient_records
-
-        except Exception as e:
-            log_error_with_method_info(e)
-
     @staticmethod
-    async def __get_data_into_explorer_dto_scheme(
-        patient_record: schemas.PatientRecords,
-    ) -> schemas.ExplorerPatientDTO:
-        try:
-            patient = await PatientDAO.find_one_or_none(Patient.id == patient_record.patient_id)
-            patient_data = patient_record.model_dump()
-
-            patient_data.update(
-                {
-                    "bp": patient.bp,
-                    "ishcemia": patient.ischemia,
-                    "dep": patient.dep,
-                    "birthday": patient.birthday,
-                    "gender": patient.gender,
-                    "inhabited_locality": patient.inhabited_locality,
-                }
+    async def __get_records_page(
+        user: User, *filter, cursor: str | None = None, offset: int | None = None, limit: int = 100
+    ) -> tuple[list[models.PatientRecord] | list[schemas.ExplorerPatientDTO], str | None]:
+        if user.role == UserRole.therapist.value:
+            # Therapists also see records that are not linked to a patient
+            return await PatientRecordsDAO.find_page_with_patient(
+                *filter, cursor=cursor, offset=offset, limit=limit, isouter=True
             )
 
-            return schemas.ExplorerPatientDTO(**patient_data)
+        if user.role == UserRole.explorer.value:
+            logger.info(f"Форматирование данных для пользователя {user.username} с ролью {user.role}")
+            rows, next_cursor = await PatientRecordsDAO.find_page_with_patient(
+                *filter, columns=EXPLORER_COLUMNS, cursor=cursor, offset=offset, limit=limit
+            )
+            return [schemas.ExplorerPatientDTO(**row._mapping) for row in rows], next_cursor
 
-        except Exception as e:
-            log_error_with_method_info(e)
+        logger.opt().critical(f"Неожиданная роль пользователя {user.username}: {user.role}")
+        raise ValueError
@@ -0,0 +1,121 @@
+import sys
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .utils import get_api_key
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval from a background thread.
+
+    Stacks are aggregated in the folded format (``outer;inner;leaf count``) understood by
+    flamegraph.pl, speedscope and most other flame graph viewers.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stopped.set()
+        self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})".replace(";", ",")
+                )
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+
+def get_profile_path(profile_id: uuid.UUID) -> Path:
+    return Path(settings.PROFILES_DIR) / f"{profile_id.hex}.folded"
+
+
+def save_profile(sampler: StackSampler, profile_id: uuid.UUID) -> None:
+    """Stops the sampler and writes its report, keeping only the newest PROFILES_MAX_FILES reports."""
+    report = sampler.stop()
+    path = get_profile_path(profile_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(report, encoding="utf-8")
+
+    profiles = []
+    for profile in path.parent.glob("*.folded"):
+        try:
+            profiles.append((profile.stat().st_mtime, profile))
+        except FileNotFoundError:  # pruned by a concurrent request
+            continue
+    profiles.sort(reverse=True)
+    for _, old_profile in profiles[settings.PROFILES_MAX_FILES :]:
+        old_profile.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """Profiles a request that carries the ``X-Profile`` header and a valid API key.
+
+    The event loop thread is sampled while the request runs, so concurrent requests show up
+    in the profile as well. The report is saved under PROFILES_DIR and its id is returned in
+    the ``X-Profile-Id`` header. Requests without the header go straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        api_key = parse_qs(scope["query_string"].decode()).get("key", [None])[0]
+        try:
+            await get_api_key(api_key)
+        except HTTPException:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER, profile_id.hex.encode()),
+                ]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Joining the sampler thread and writing the file would otherwise block the event loop
+            await run_in_threadpool(save_profile, sampler, profile_id)
+            logger.info(f"Профиль запроса {scope['method']} {scope['path']} сохранен: {profile_id.hex}")
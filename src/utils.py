@@ -1,4 +1,6 @@
 import inspect
+import sys
+from types import CodeType
 
 from fastapi import Depends, HTTPException
 from fastapi.security import APIKeyQuery
@@ -7,21 +9,41 @@ from loguru import logger
 from .config import settings
 
 
+# Class resolved for each calling function, so module globals are scanned once per call site
+_class_names: dict[CodeType, str | None] = {}
+
+
+def _find_class_name(frame) -> str | None:
+    code = frame.f_code
+    if code not in _class_names:
+        _class_names[code] = next(
+            (
+                value.__name__
+                for value in list(frame.f_globals.values())
+                if inspect.isclass(value) and value.__dict__.get(code.co_name) is not None
+            ),
+            None,
+        )
+    return _class_names[code]
+
+
 def log_error_with_method_info(exception: Exception):
-    frame_info = inspect.stack()[2]
-    caller_frame = frame_info.frame
-    caller_globals = caller_frame.f_globals
-
-    class_name = None
-    for _, value in caller_globals.items():
-        if inspect.isclass(value) and issubclass(value, object):
-            if value.__dict__.get(frame_info.function, None) is not None:
-                class_name = value.__name__
-                break
-
-    method_name = frame_info.function
-    module_name = caller_globals.get("__name__", None)
-    line_number = frame_info.lineno
+    # Only the frame itself is touched: no source lines are read, unlike inspect.stack()
+    caller_frame = sys._getframe(2)
+    code = caller_frame.f_code
+
+    class_name = _find_class_name(caller_frame)
+
+    method_name = code.co_name
+    module_name = caller_frame.f_globals.get("__name__", None)
+    line_number = caller_frame.f_lineno
+
+    # Client errors such as an invalid pagination cursor are expected and need no traceback
+    if isinstance(exception, HTTPException) and exception.status_code < 500:
+        logger.warning(
+            f"Ошибка клиента в методе {class_name}.{method_name}: {exception.status_code} {exception.detail}"
+        )
+        raise exception
 
     logger.opt(exception=exception).critical(
         f"Неожиданная ошибка в методе {class_name}.{method_name} "
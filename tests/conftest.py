@@ -53,3 +53,25 @@ async def authenticated_ac():
 async def ac():
     async with AsyncClient(app=fastapi_app, base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture
+def walk_pages():
+    """Follows next_cursor from the first page to the last and returns the items of every page."""
+
+    async def walk(client: AsyncClient, url: str, limit: int, **params) -> list[dict]:
+        items = []
+        params = {**params, "limit": limit}
+        while True:
+            response = await client.get(url, params=params)
+            assert response.status_code == 200
+
+            page = response.json()
+            assert len(page["items"]) <= limit
+            items.extend(page["items"])
+
+            if page["next_cursor"] is None:
+                return items
+            params["cursor"] = page["next_cursor"]
+
+    return walk
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from src.auth import exceptions
+from src.auth.utils import get_hashed_password, get_hashing_stats, validate_password
+
+
+async def test_hashed_password_round_trip():
+    hashed_password = await get_hashed_password("secret password")
+
+    await validate_password("secret password", hashed_password)
+    with pytest.raises(exceptions.InvalidAuthenthicationCredential):
+        await validate_password("wrong password", hashed_password)
+
+
+async def test_concurrent_hashes_are_counted():
+    completed = get_hashing_stats()["completed"]
+    count = get_hashing_stats()["max_concurrency"] * 2 + 1
+
+    hashed_passwords = await asyncio.gather(*(get_hashed_password(f"password {i}") for i in range(count)))
+
+    assert len(set(hashed_passwords)) == count
+    stats = get_hashing_stats()
+    assert stats["completed"] == completed + count
+    assert stats["queued"] == stats["running"] == 0
@@ -0,0 +1,43 @@
+import contextlib
+import types
+
+from sqlalchemy.dialects import postgresql
+
+from src.auth import dao
+from src.auth.dao import RefreshTokenDAO
+from src.auth.service import AuthService
+
+
+async def test_purge_deletes_batches_until_short_batch(monkeypatch):
+    batches = iter([3, 3, 1, 3])
+    limits = []
+
+    async def delete_expired(limit):
+        limits.append(limit)
+        return next(batches)
+
+    monkeypatch.setattr(RefreshTokenDAO, "delete_expired", delete_expired)
+
+    assert await AuthService.purge_expired_refresh_tokens(batch_size=3) == 7
+    assert limits == [3, 3, 3]
+
+
+async def test_delete_expired_skips_locked_rows(monkeypatch):
+    statements = []
+
+    class Session:
+        async def execute(self, stmt):
+            statements.append(stmt)
+            return types.SimpleNamespace(rowcount=2)
+
+    @contextlib.asynccontextmanager
+    async def session_scope():
+        yield Session()
+
+    monkeypatch.setattr(dao, "session_scope", session_scope)
+
+    assert await RefreshTokenDAO.delete_expired(limit=100) == 2
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "refresh_tokens.expires_at <= now()" in sql
+    assert "ORDER BY refresh_tokens.expires_at" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
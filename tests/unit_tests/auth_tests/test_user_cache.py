@@ -0,0 +1,16 @@
+from httpx import AsyncClient
+
+
+async def test_cached_user_survives_rolled_back_request(ac: AsyncClient):
+    credentials = {"username": "cache_rollback_user", "password": "cache_rollback_user"}
+    response = await ac.post("/auth/registration", json={**credentials, "role": "therapist"})
+    assert response.status_code == 201
+    response = await ac.post("/auth/login", json=credentials)
+    assert response.status_code == 200
+
+    # The user is resolved and cached before body validation fails and the session rolls back
+    response = await ac.post("/patient/create", json={"full_name": "no gender"})
+    assert response.status_code == 422
+
+    response = await ac.get("/patient/get_all_by_therapist")
+    assert response.status_code == 200
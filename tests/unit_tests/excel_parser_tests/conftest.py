@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+
+# The parser is a standalone script whose modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parents[3] / "src" / "excel_parser"))
@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from excel_parser import parse_rows
+
+
+ROWS = [
+    (
+        2,
+        (
+            "Иванов Иван",
+            "м",
+            "01.01.1990",
+            None,
+            None,
+            "г Москва",
+            "инженер",
+            "ДЭП",
+            "2024-01-01",
+            "2023-01-01",
+            "",
+        ),
+    ),
+    (
+        3,
+        (
+            "Петрова Анна",
+            "ж",
+            datetime(1975, 5, 3),
+            None,
+            None,
+            " д Липки ",
+            "врач",
+            "ИБС",
+            "2024-02-01",
+            "",
+            "",
+        ),
+    ),
+    (
+        4,
+        (
+            "Сидоров",
+            "м",
+            "нет даты",
+            None,
+            None,
+            None,
+            None,
+            "ГБ 2 ст",
+            "2024-03-01",
+            "2022-03-01",
+            "эналаприл",
+        ),
+    ),
+    (5, ("too short",)),
+]
+
+
+def test_worker_output_matches_serial_parse():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        patients, failed_rows = executor.submit(parse_rows, ROWS, "prefix").result()
+
+    expected_patients, expected_failed_rows = parse_rows(ROWS, "prefix")
+    assert [patient.model_dump() for patient in patients] == [
+        patient.model_dump() for patient in expected_patients
+    ]
+    assert [patient.import_key for patient in patients] == ["prefix:2", "prefix:3", "prefix:4"]
+    assert failed_rows == expected_failed_rows
+    assert [failed_row["row"] for failed_row in failed_rows] == [5]
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import excel_parser
+from checkpoint import ImportCheckpoint
+from constants import IMPORT_BATCH_FAILED_ERROR
+from excel_parser import RowProcessor, StageStats
+
+
+ROW = (
+    "Иванов Иван",
+    "м",
+    "01.01.1990",
+    None,
+    None,
+    "г Москва",
+    "инженер",
+    "ДЭП",
+    "2024-01-01",
+    "2023-01-01",
+    "",
+)
+
+
+async def upload(monkeypatch, tmp_path, response: dict | None) -> ImportCheckpoint:
+    async def import_patients(session, cookies, chunk):
+        return response
+
+    monkeypatch.setattr(excel_parser.APIClient, "import_patients", import_patients)
+    checkpoint = ImportCheckpoint(str(tmp_path / "checkpoint.json"), "0" * 64)
+    checkpoint.register_chunk(0, 301)
+
+    queue = asyncio.Queue()
+    await queue.put((0, [RowProcessor.parse_row(ROW)]))
+    await queue.put(None)
+    await RowProcessor.upload_chunks(queue, None, None, checkpoint, StageStats("upload"))
+    return checkpoint
+
+
+async def test_committed_chunk_advances_checkpoint(monkeypatch, tmp_path):
+    response = {"imported": 1, "failed": 0, "rows": [{"row": 1, "id": "x", "existing": False, "error": None}]}
+    checkpoint = await upload(monkeypatch, tmp_path, response)
+    assert checkpoint.completed_row == 301
+    with open(checkpoint.path, encoding="utf-8") as file:
+        assert json.load(file)["completed_row"] == 301
+
+
+async def test_rolled_back_chunk_keeps_checkpoint(monkeypatch, tmp_path):
+    response = {
+        "imported": 0,
+        "failed": 1,
+        "rows": [{"row": 1, "id": None, "existing": False, "error": IMPORT_BATCH_FAILED_ERROR}],
+    }
+    checkpoint = await upload(monkeypatch, tmp_path, response)
+    assert checkpoint.completed_row == 0
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+async def test_failed_request_keeps_checkpoint(monkeypatch, tmp_path):
+    checkpoint = await upload(monkeypatch, tmp_path, None)
+    assert checkpoint.completed_row == 0
+
+
+async def test_unparseable_rows_go_to_error_log(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    checkpoint = ImportCheckpoint(str(tmp_path / "checkpoint.json"), "0" * 64)
+    queue = asyncio.Queue()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await RowProcessor.parse_chunk(
+            executor, 0, [(2, ROW), (3, ("too short",))], checkpoint, queue, StageStats("parse")
+        )
+
+    _, patients = await queue.get()
+    assert [patient.import_key for patient in patients] == [f"{checkpoint.key_prefix}:2"]
+    error_log = (tmp_path / "error_log.txt").read_text()
+    assert "'row': 3" in error_log
+    assert "IndexError" in error_log
@@ -0,0 +1,20 @@
+from httpx import AsyncClient
+
+
+async def test_get_all_by_therapist(authenticated_ac: AsyncClient, walk_pages):
+    response = await authenticated_ac.post(
+        "/patient/create", json={"full_name": "records_patient", "gender": "ж"}
+    )
+    assert response.status_code == 200
+    patient_id = response.json()["id"]
+
+    for visit in ("2024-01-01", "2024-02-01", "2024-03-01"):
+        response = await authenticated_ac.post(
+            "/patient_records/create", json={"visit": visit, "diagnosis": "бп", "patient_id": patient_id}
+        )
+        assert response.status_code == 200
+
+    records = await walk_pages(authenticated_ac, "/patient_records/get_all_by_therapist", 2)
+    record_ids = [record["id"] for record in records if record["patient_id"] == patient_id]
+
+    assert len(record_ids) == len(set(record_ids)) == 3
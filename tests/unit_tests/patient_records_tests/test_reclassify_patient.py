@@ -0,0 +1,34 @@
+from httpx import AsyncClient
+
+
+async def test_record_diagnosis_updates_patient_flags(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.post(
+        "/patient/create", json={"full_name": "classified_patient", "gender": "м"}
+    )
+    assert response.status_code == 200
+    patient_id = response.json()["id"]
+    assert response.json()["bp"] is False
+
+    response = await authenticated_ac.post(
+        "/patient_records/create",
+        json={"visit": "2024-01-01", "diagnosis": "ДЭП 2 ст., БП", "patient_id": patient_id},
+    )
+    assert response.status_code == 200
+    record_id = response.json()["id"]
+
+    patient = (await authenticated_ac.get("/patient/get", params={"patient_id": patient_id})).json()
+    assert patient["bp"] is True
+    assert patient["dep"] is True
+    assert patient["ischemia"] is False
+
+    response = await authenticated_ac.patch(
+        "/patient_records/update_patient_record",
+        params={"patient_record_id": record_id},
+        json={"diagnosis": "ишемия"},
+    )
+    assert response.status_code == 200
+
+    patient = (await authenticated_ac.get("/patient/get", params={"patient_id": patient_id})).json()
+    assert patient["bp"] is False
+    assert patient["dep"] is False
+    assert patient["ischemia"] is True
@@ -0,0 +1,33 @@
+import pytest
+
+from src.patient.classifier import DiagnosisClassifier, diagnosis_classifier
+
+
+DIAGNOSES = ["ишемия", "бп", None, "", "ДЭП 2 ст., БП", "гипертония\nбп", "  бп", "дэп."]
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [
+        {"dep": [r"\bд[эе]п\b"], "bp": [r"\bбп\b"], "ischemia": [r"\bишемия\b"]},
+        # Patterns that could reach into a neighbouring text if the batch were scanned as one string
+        {"bp": [r"\sбп\b"], "dep": [r"^дэп"], "ischemia": [r"ишемия[\s\S]*бп"]},
+        {"bp": [r"(?<=я\n)бп", r"бп$"], "dep": [r"[^.]*\."]},
+        # Overlapping matches of different flags
+        {"bp": [r"бп"], "ischemia": [r"\bбп\b"]},
+    ],
+)
+def test_classify_many_matches_classify(rules):
+    classifier = DiagnosisClassifier(rules)
+    assert classifier.classify_many(DIAGNOSES) == [classifier.classify(d) for d in DIAGNOSES]
+
+
+def test_classify_default_rules():
+    assert diagnosis_classifier.classify("ДЭП 2 ст., БП") == {"dep": True, "bp": True, "ischemia": False}
+    assert diagnosis_classifier.classify("бпх") == {"dep": False, "bp": False, "ischemia": False}
+    assert diagnosis_classifier.classify(None) == {"dep": False, "bp": False, "ischemia": False}
+
+
+def test_boundary_pattern_does_not_spill_into_next_text():
+    classifier = DiagnosisClassifier({"bp": [r"\sбп\b"]})
+    assert classifier.classify_many(["ишемия", "бп"]) == [{"bp": False}, {"bp": False}]
@@ -0,0 +1,48 @@
+import typing
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from src.patient import models, schemas
+from src.patient.service import FiltersBuilder
+
+
+async def render(
+    filters: list[schemas.GetFilters], global_rule: schemas.GlobalRule
+) -> tuple[str, dict[str, typing.Any]]:
+    where, params = await FiltersBuilder.apply_filters(filters, global_rule)
+    compiled = select(models.Patient.id).where(where).params(**params).compile(dialect=asyncpg.dialect())
+    return str(compiled), compiled.params
+
+
+def make_filters(name: str, locality: str, birthday: str) -> list[schemas.GetFilters]:
+    return [
+        schemas.GetFilters(field="full_name", rule="starts_with", value=name),
+        schemas.GetFilters(field="inhabited_locality", rule="not_equals", value=locality),
+        schemas.GetFilters(field="birthday", rule="greater_than", value=birthday),
+        schemas.GetFilters(field="dep", rule="equals", value="true"),
+    ]
+
+
+async def test_cached_plan_renders_same_sql_as_fresh_plan():
+    FiltersBuilder.compile_plan.cache_clear()
+    await render(make_filters("Иван", "Город", "1990-01-01"), schemas.GlobalRule.EVERY)
+
+    filters = make_filters("Пет_ров%", "Село", "1975-05-03")
+    cached = await render(filters, schemas.GlobalRule.EVERY)
+    assert FiltersBuilder.compile_plan.cache_info().hits == 1
+
+    FiltersBuilder.compile_plan.cache_clear()
+    fresh = await render(filters, schemas.GlobalRule.EVERY)
+    assert FiltersBuilder.compile_plan.cache_info().misses == 1
+
+    assert cached == fresh
+    assert cached[1]["filter_0"] == "пет\\_ров\\%%"
+    assert "Иван" not in cached[0]
+
+
+async def test_global_rule_is_part_of_plan_shape():
+    filters = make_filters("Иван", "Город", "1990-01-01")
+    every, _ = await render(filters, schemas.GlobalRule.EVERY)
+    some, _ = await render(filters, schemas.GlobalRule.SOME)
+    assert " AND " in every and " OR " in some
@@ -0,0 +1,27 @@
+from httpx import AsyncClient
+
+
+async def test_get_all_by_therapist_cursor(authenticated_ac: AsyncClient, walk_pages):
+    for i in range(5):
+        response = await authenticated_ac.post(
+            "/patient/create", json={"full_name": f"cursor_patient_{i}", "gender": "м"}
+        )
+        assert response.status_code == 200
+
+    seen_ids = [
+        patient["id"] for patient in await walk_pages(authenticated_ac, "/patient/get_all_by_therapist", 2)
+    ]
+
+    assert len(seen_ids) == len(set(seen_ids))
+    assert len(seen_ids) >= 5
+
+
+async def test_get_all_by_therapist_invalid_cursor(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/patient/get_all_by_therapist", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_get_all_by_therapist_zero_limit(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/patient/get_all_by_therapist", params={"limit": 0})
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
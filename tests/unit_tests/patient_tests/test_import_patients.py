@@ -0,0 +1,53 @@
+import json
+
+from httpx import AsyncClient
+
+
+async def test_import_patients(authenticated_ac: AsyncClient):
+    rows = [
+        json.dumps(
+            {
+                "full_name": f"imported_patient_{i}",
+                "gender": "ж",
+                "records": [{"visit": "2020-01-01", "diagnosis": "бп"}, {"visit": "2021-01-01"}],
+            }
+        )
+        for i in range(3)
+    ]
+    rows.insert(1, json.dumps({"full_name": "missing_gender"}))
+
+    response = await authenticated_ac.post(
+        "/patient/import",
+        content="\n".join(rows),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+
+    result = response.json()
+    assert result["imported"] == 3
+    assert result["failed"] == 1
+    assert [row["row"] for row in result["rows"]] == [1, 2, 3, 4]
+    assert result["rows"][1]["error"]
+
+    patient_id = result["rows"][0]["id"]
+    response = await authenticated_ac.get(
+        "/patient_records/get_all_by_patient", params={"patient_id": patient_id}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+
+
+async def test_import_patients_is_idempotent(authenticated_ac: AsyncClient):
+    body = "\n".join(
+        json.dumps({"full_name": f"keyed_patient_{i}", "gender": "м", "import_key": f"sheet:{i}"})
+        for i in range(2)
+    )
+
+    first = await authenticated_ac.post("/patient/import", content=body)
+    assert first.status_code == 200
+    assert first.json()["imported"] == 2
+
+    second = await authenticated_ac.post("/patient/import", content=body)
+    assert second.status_code == 200
+    assert all(row["existing"] for row in second.json()["rows"])
+    assert [row["id"] for row in second.json()["rows"]] == [row["id"] for row in first.json()["rows"]]
@@ -0,0 +1,41 @@
+from httpx import AsyncClient
+
+
+async def test_update_invalidates_cached_patient(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.post(
+        "/patient/create", json={"full_name": "cached_patient", "gender": "м"}
+    )
+    assert response.status_code == 200
+    patient_id = response.json()["id"]
+
+    # The upper-case id must share the cache entry and its invalidation with the canonical one
+    for requested_id in (patient_id, patient_id.upper()):
+        response = await authenticated_ac.get("/patient/get", params={"patient_id": requested_id})
+        assert response.json()["full_name"] == "cached_patient"
+
+    response = await authenticated_ac.patch(
+        "/patient/update", params={"patient_id": patient_id}, json={"full_name": "renamed_patient"}
+    )
+    assert response.status_code == 200
+
+    for requested_id in (patient_id, patient_id.upper()):
+        response = await authenticated_ac.get("/patient/get", params={"patient_id": requested_id})
+        assert response.json()["full_name"] == "renamed_patient"
+
+
+async def test_new_record_invalidates_cached_records(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.post(
+        "/patient/create", json={"full_name": "cached_records", "gender": "ж"}
+    )
+    patient_id = response.json()["id"]
+
+    for expected_count in (1, 2):
+        response = await authenticated_ac.post(
+            "/patient_records/create", json={"visit": "2024-01-01", "patient_id": patient_id}
+        )
+        assert response.status_code == 200
+
+        response = await authenticated_ac.get(
+            "/patient_records/get_all_by_patient", params={"patient_id": patient_id.upper()}
+        )
+        assert len(response.json()["items"]) == expected_count
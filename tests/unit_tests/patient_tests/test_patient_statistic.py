@@ -0,0 +1,76 @@
+import uuid
+
+from src.patient import models, schemas
+from src.patient.dao import PatientStatisticDAO
+from src.patient.service import PatientService
+
+
+def make_patient(therapist_id: uuid.UUID, **fields) -> models.Patient:
+    return models.Patient(
+        **{
+            "full_name": "Иванов Иван",
+            "gender": "м",
+            "inhabited_locality": "Город",
+            "bp": True,
+            "dep": False,
+            "ischemia": False,
+            "therapist_id": therapist_id,
+            **fields,
+        }
+    )
+
+
+async def sync(monkeypatch, before, after) -> list[tuple[uuid.UUID, dict[str, int]]]:
+    deltas = []
+
+    async def add_delta(therapist_id, delta):
+        deltas.append((therapist_id, delta))
+
+    monkeypatch.setattr(PatientStatisticDAO, "add_delta", add_delta)
+    await PatientService.sync_statistic(before=before, after=after)
+    return deltas
+
+
+def counters(**values) -> dict[str, int]:
+    return {name: values.get(name, 0) for name in PatientStatisticDAO.COUNTERS}
+
+
+def test_snapshot_is_not_refreshed_with_patient():
+    patient = make_patient(uuid.uuid4())
+    snapshot = PatientService.snapshot(patient)
+    patient.bp = False
+    patient.inhabited_locality = "Село"
+
+    assert isinstance(snapshot, schemas.PatientCreateDB)
+    assert snapshot.bp is True
+    assert snapshot.inhabited_locality == "Город"
+    assert PatientService.snapshot(None) is None
+
+
+async def test_update_applies_only_changed_counters(monkeypatch):
+    therapist_id = uuid.uuid4()
+    before = PatientService.snapshot(make_patient(therapist_id))
+    after = PatientService.snapshot(make_patient(therapist_id, bp=False, dep=True, inhabited_locality="Село"))
+
+    assert await sync(monkeypatch, before, after) == [
+        (therapist_id, counters(bp=-1, dep=1, city=-1, district=1))
+    ]
+
+
+async def test_therapist_change_moves_patient_between_statistics(monkeypatch):
+    old_therapist_id, new_therapist_id = uuid.uuid4(), uuid.uuid4()
+    before = PatientService.snapshot(make_patient(old_therapist_id))
+    after = PatientService.snapshot(make_patient(new_therapist_id, gender="ж"))
+
+    assert await sync(monkeypatch, before, after) == [
+        (old_therapist_id, counters(bp=-1, city=-1, male=-1)),
+        (new_therapist_id, counters(bp=1, city=1, female=1)),
+    ]
+
+
+async def test_create_and_delete(monkeypatch):
+    therapist_id = uuid.uuid4()
+    patient = PatientService.snapshot(make_patient(therapist_id))
+
+    assert await sync(monkeypatch, None, patient) == [(therapist_id, counters(bp=1, city=1, male=1))]
+    assert await sync(monkeypatch, patient, None) == [(therapist_id, counters(bp=-1, city=-1, male=-1))]
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import func, select
+
+from src.database import session_scope, transaction_scope
+from src.patient_records.dao import PatientRecordsDAO
+from src.patient_records.models import PatientRecord
+
+
+async def count_records(diagnosis: str) -> int:
+    async with session_scope() as db:
+        result = await db.execute(select(func.count()).where(PatientRecord.diagnosis == diagnosis))
+        return result.scalar_one()
+
+
+# Below the threshold rows go through executemany, from it on through COPY
+@pytest.mark.parametrize("count", [10, PatientRecordsDAO.COPY_THRESHOLD])
+async def test_add_many_commits(count):
+    diagnosis = f"add_many_commit_{count}"
+    async with transaction_scope():
+        ids = await PatientRecordsDAO.add_many(
+            [{"visit": "2024-01-01", "diagnosis": diagnosis}] * count, return_ids=True
+        )
+
+    assert len(set(ids)) == count
+    assert await count_records(diagnosis) == count
+
+
+@pytest.mark.parametrize("count", [10, PatientRecordsDAO.COPY_THRESHOLD])
+async def test_add_many_rolls_back(count):
+    diagnosis = f"add_many_rollback_{count}"
+    with pytest.raises(RuntimeError):
+        async with transaction_scope():
+            # The insert is the first statement of the transaction
+            await PatientRecordsDAO.add_many([{"visit": "2024-01-01", "diagnosis": diagnosis}] * count)
+            raise RuntimeError
+
+    assert await count_records(diagnosis) == 0
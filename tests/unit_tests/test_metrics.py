@@ -0,0 +1,41 @@
+import types
+
+import pytest
+from loguru import logger
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.config import settings
+from src.metrics import instrument_engine, registry
+
+
+def test_slow_query_log_masks_inline_literals(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    messages = []
+    sink_id = logger.add(messages.append, level="WARNING", format="{message}")
+    try:
+        registry.observe_query(
+            0.5, "SELECT id FROM patients WHERE lower(full_name) LIKE 'иван''ов%' AND gender = $1", ("м",)
+        )
+    finally:
+        logger.remove(sink_id)
+
+    assert len(messages) == 1
+    assert "иван" not in messages[0]
+    assert "LIKE '?'" in messages[0]
+
+
+def test_failed_statement_pops_query_start_time(monkeypatch):
+    monkeypatch.setattr(registry, "engine", registry.engine)
+    engine = create_engine("sqlite://")
+    instrument_engine(types.SimpleNamespace(sync_engine=engine))
+    queries = sum(registry.db_queries.values())
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 2"))
+
+        assert conn.info["query_started_at"] == []
+    assert sum(registry.db_queries.values()) == queries + 3
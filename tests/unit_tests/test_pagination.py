@@ -0,0 +1,35 @@
+import uuid
+
+import pytest
+
+from src.pagination import InvalidCursor, KeysetPaginator
+from src.patient.models import Patient
+
+
+class Row:
+    def __init__(self, full_name: str):
+        self.id = uuid.uuid4()
+        self.full_name = full_name
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_page_without_rows_has_no_cursor(limit):
+    paginator = KeysetPaginator(Patient)
+    assert paginator.page([Row("a")], limit) == ([], None)
+
+
+def test_page_cursor_round_trip():
+    paginator = KeysetPaginator(Patient, [("full_name", False)])
+    rows = [Row("a"), Row("b"), Row("c")]
+
+    page, cursor = paginator.page(rows, 2)
+    assert page == rows[:2]
+    assert paginator._decode(cursor) == [rows[1].full_name, rows[1].id]
+
+    assert paginator.page(rows[2:], 2) == (rows[2:], None)
+
+
+def test_cursor_of_other_sort_order_is_rejected():
+    _, cursor = KeysetPaginator(Patient, [("full_name", False)]).page([Row("a"), Row("b")], 1)
+    with pytest.raises(InvalidCursor):
+        KeysetPaginator(Patient, [("full_name", True)])._decode(cursor)